@@ -0,0 +1,222 @@
+"""
+Response cache for AWS Cost Explorer get_cost_and_usage queries.
+
+Every get_cost_and_usage request (each page) is billed at $0.01, and most
+queries ask again for months whose costs no longer change. Results are cached
+under a hash of the query (TimePeriod, Granularity, Metrics, GroupBy, Filter):
+queries for closed months are kept permanently, queries that touch the open
+month expire after a short TTL.
+
+Pages are cached one object each, plus a manifest written after the last page,
+so a query is only served from the cache once it was fetched completely and
+memory stays bounded by one page either way.
+
+The 35.4 cost optimization scripts import this module from here, so this is
+the only copy to edit.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+# Cost Explorer API price per request (every page is a request)
+COST_PER_REQUEST = 0.01
+
+# How long results that include the current month stay cached
+OPEN_MONTH_TTL_SECONDS = int(os.environ.get('CE_CACHE_TTL_SECONDS', '3600'))
+
+# A month still receives adjustments (credits, refunds, late usage) for a few days after it ends
+CLOSED_MONTH_SETTLE_DAYS = int(os.environ.get('CE_CACHE_SETTLE_DAYS', '3'))
+
+# Query fields that determine the result
+FINGERPRINT_FIELDS = ('TimePeriod', 'Granularity', 'Metrics', 'GroupBy', 'Filter')
+
+def query_fingerprint(query, namespace=''):
+    """
+    Canonical hash of a get_cost_and_usage query
+
+    Keys are sorted and Metrics are order-independent, so equivalent queries
+    written differently share an entry. namespace (for example the account
+    ID) keeps accounts sharing one cache bucket apart.
+    """
+    canonical = {field: query.get(field) for field in FINGERPRINT_FIELDS}
+    canonical['Metrics'] = sorted(canonical['Metrics'] or [])
+    canonical['namespace'] = namespace
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def cli_command(query):
+    """
+    aws ce get-cost-and-usage command line for a query
+
+    Built from the same dict that keys the cache, so the cached and the
+    fetched results always describe the same query.
+    """
+    time_period = query['TimePeriod']
+    command = [
+        'aws', 'ce', 'get-cost-and-usage',
+        '--time-period', f"Start={time_period['Start']},End={time_period['End']}",
+        '--granularity', query['Granularity'],
+        '--metrics', *query['Metrics']
+    ]
+    if query.get('GroupBy'):
+        command += ['--group-by', *(f"Type={group['Type']},Key={group['Key']}" for group in query['GroupBy'])]
+    if query.get('Filter'):
+        command += ['--filter', json.dumps(query['Filter'], separators=(',', ':'))]
+    return command + ['--output', 'json']
+
+def is_closed_period(time_period, now=None):
+    """True when the period ends before the last month that can still change"""
+    now = now or datetime.now(timezone.utc)
+    settled = (now - timedelta(days=CLOSED_MONTH_SETTLE_DAYS)).strftime('%Y-%m-01')
+    return time_period['End'] <= settled
+
+class S3CacheBackend:
+    """Cache objects stored under a prefix in an S3 bucket"""
+
+    def __init__(self, s3_client, bucket, prefix='ce-cache/'):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        except self.s3_client.exceptions.NoSuchKey:
+            return None
+        return json.loads(response['Body'].read())
+
+    def put(self, key, document):
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=self.prefix + key,
+            Body=json.dumps(document, separators=(',', ':')),
+            ContentType='application/json'
+        )
+
+class LocalCacheBackend:
+    """Cache objects stored as files in a local directory (scripts and tests)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def get(self, key):
+        try:
+            with open(os.path.join(self.directory, key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, document):
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a reader never sees a half-written file
+        with open(path + '.tmp', 'w') as f:
+            json.dump(document, f, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+
+def default_backend():
+    """
+    Backend for command-line scripts
+
+    S3 when CE_CACHE_BUCKET is set (requires boto3), so several machines can
+    share results; otherwise files under CE_CACHE_DIR (default ~/.cache/ce-cache).
+    """
+    bucket = os.environ.get('CE_CACHE_BUCKET')
+    if bucket:
+        import boto3
+        return S3CacheBackend(boto3.client('s3'), bucket, os.environ.get('CE_CACHE_PREFIX', 'ce-cache/'))
+    return LocalCacheBackend(os.environ.get('CE_CACHE_DIR', os.path.expanduser('~/.cache/ce-cache')))
+
+class CostExplorerCache:
+    """
+    Serve get_cost_and_usage pages from a cache backend when possible
+
+    Cache errors are logged and treated as misses, so a missing bucket
+    permission never breaks the query itself.
+    """
+
+    def __init__(self, backend, namespace='', ttl_seconds=OPEN_MONTH_TTL_SECONDS):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.api_requests = 0
+        self.api_requests_saved = 0
+
+    def pages(self, query, fetch_pages):
+        """
+        Yield the result pages for a query
+
+        fetch_pages() must return an iterable of live API pages; it is only
+        called on a cache miss.
+        """
+        fingerprint = query_fingerprint(query, self.namespace)
+        manifest = self._read(f"{fingerprint}/manifest.json")
+        if manifest and (manifest['expires_at'] is None or manifest['expires_at'] > time.time()):
+            cached = yield from self._cached_pages(fingerprint, manifest['pages'])
+            if cached:
+                self.hits += 1
+                self.api_requests_saved += manifest['pages']
+                return
+
+        self.misses += 1
+        closed = is_closed_period(query['TimePeriod'])
+        page_count = 0
+        for page in fetch_pages():
+            self.api_requests += 1
+            self._write(f"{fingerprint}/page-{page_count:05d}.json", page)
+            page_count += 1
+            yield page
+
+        # Nothing fetched (for example a failed CLI call): leave no entry behind
+        if not page_count:
+            return
+        self._write(f"{fingerprint}/manifest.json", {
+            'query': {field: query.get(field) for field in FINGERPRINT_FIELDS if field in query},
+            'pages': page_count,
+            'closed': closed,
+            'cached_at': time.time(),
+            'expires_at': None if closed else time.time() + self.ttl_seconds
+        })
+
+    def _cached_pages(self, fingerprint, page_count):
+        # Only the first page is checked before yielding; later pages were written before the manifest
+        for number in range(page_count):
+            page = self._read(f"{fingerprint}/page-{number:05d}.json")
+            if page is None:
+                if number == 0:
+                    return False
+                raise RuntimeError(f"Cost Explorer cache entry {fingerprint} is missing page {number}")
+            yield page
+        return True
+
+    def _read(self, key):
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Cost Explorer cache read failed for {key}: {e}")
+            return None
+
+    def _write(self, key, document):
+        try:
+            self.backend.put(key, document)
+        except Exception as e:
+            logger.warning(f"Cost Explorer cache write failed for {key}: {e}")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'api_requests': self.api_requests,
+            'api_requests_saved': self.api_requests_saved,
+            'api_cost_saved': round(self.api_requests_saved * COST_PER_REQUEST, 2)
+        }
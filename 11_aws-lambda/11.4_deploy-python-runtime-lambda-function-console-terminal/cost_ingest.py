@@ -0,0 +1,243 @@
+"""
+Incremental daily cost ingestion into date-partitioned S3 objects.
+
+Instead of re-querying the whole month on every run, DAILY costs are fetched
+only for the days after a high-water mark and merged into one NDJSON object per
+month (Hive-style year=/month= keys, readable by Athena as well):
+
+    cost-data/daily/group_by=SERVICE/_state.json
+    cost-data/daily/group_by=SERVICE/year=2024/month=01/costs.json
+
+Cost Explorer keeps revising recent days (late usage, credits, refunds), so
+the last few days before the mark are fetched again and replaced on each run.
+Lookups over any date range read one small object per month and make no Cost
+Explorer requests.
+"""
+
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+# Days before the high-water mark that are fetched again and replaced on each run
+RESTATE_DAYS = int(os.environ.get('COST_INGEST_RESTATE_DAYS', '3'))
+
+# Metrics stored for every (date, group) row
+METRICS = ('BlendedCost', 'UnblendedCost', 'UsageQuantity')
+
+# Parallel partition reads for lookups
+LOOKUP_WORKERS = 8
+
+def month_starts(start, end):
+    """First day of every month touching the days start..end-1"""
+    month = start.replace(day=1)
+    while month < end:
+        yield month
+        month = (month + timedelta(days=32)).replace(day=1)
+
+def rows_from_pages(pages):
+    """
+    Flatten DAILY get_cost_and_usage pages into one row per (date, group)
+
+    Rows hold the metric amounts as floats; the currency is the BlendedCost unit.
+    """
+    for page in pages:
+        for time_period in page.get('ResultsByTime', []):
+            day = time_period['TimePeriod']['Start']
+            for group in time_period.get('Groups', []):
+                metrics = group.get('Metrics', {})
+                row = {'date': day, 'group': group.get('Keys', ['Unknown'])[0]}
+                for metric in METRICS:
+                    row[metric] = float(metrics.get(metric, {}).get('Amount', 0))
+                row['currency'] = metrics.get('BlendedCost', {}).get('Unit', 'USD')
+                yield row
+
+class DailyCostStore:
+    """Monthly NDJSON partitions of daily cost rows, plus the ingestion state"""
+
+    def __init__(self, s3_client, bucket, group_by='SERVICE', prefix='cost-data/daily/'):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.group_by = group_by
+        self.prefix = f"{prefix}group_by={group_by}/"
+        self.partitions_read = 0
+
+    def partition_key(self, month):
+        return f"{self.prefix}year={month.year}/month={month.month:02d}/costs.json"
+
+    def _get(self, key):
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=key)
+        except self.s3_client.exceptions.NoSuchKey:
+            return None
+        return response['Body'].read().decode('utf-8')
+
+    def read_state(self):
+        body = self._get(f"{self.prefix}_state.json")
+        return json.loads(body) if body else None
+
+    def write_state(self, state):
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=f"{self.prefix}_state.json",
+            Body=json.dumps(state, indent=2),
+            ContentType='application/json'
+        )
+
+    def read_partition(self, month):
+        body = self._get(self.partition_key(month))
+        self.partitions_read += 1
+        if not body:
+            return []
+        return [json.loads(line) for line in body.splitlines() if line]
+
+    def write_partition(self, month, rows):
+        rows = sorted(rows, key=lambda row: (row['date'], row['group']))
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=self.partition_key(month),
+            Body=''.join(json.dumps(row, separators=(',', ':')) + '\n' for row in rows),
+            ContentType='application/x-ndjson'
+        )
+
+    def merge_days(self, month, start, end, rows):
+        """
+        Replace the days start..end-1 of one month's partition with rows
+
+        Every day in the range is replaced, including days that no longer
+        have any rows, so restated days never leave stale groups behind.
+        """
+        first, last = start.isoformat(), end.isoformat()
+        kept = [row for row in self.read_partition(month) if not first <= row['date'] < last]
+        self.write_partition(month, kept + rows)
+
+    def rows(self, start, end):
+        """Stored rows for the days start..end-1, read one partition per month in parallel"""
+        months = list(month_starts(start, end))
+        first, last = start.isoformat(), end.isoformat()
+        with ThreadPoolExecutor(max_workers=min(LOOKUP_WORKERS, len(months) or 1)) as executor:
+            for partition in executor.map(self.read_partition, months):
+                for row in partition:
+                    if first <= row['date'] < last:
+                        yield row
+
+def ingest_daily_costs(fetch_pages, store, backfill_from=None, today=None):
+    """
+    Fetch the days after the high-water mark and merge them into the store
+
+    The RESTATE_DAYS days up to the mark are fetched again along with them.
+    fetch_pages(query) must return the get_cost_and_usage pages for a query.
+    The first run starts at backfill_from (default: the start of yesterday's
+    month); a later run can pass an earlier backfill_from to extend history,
+    which fetches only the days before the first ingested day on top of the
+    usual recent days. Days up to yesterday are ingested, since today's costs
+    are still incomplete. Returns a report of what was fetched and written.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    end = today
+    state = store.read_state() or {}
+    first_day = date.fromisoformat(state['first_day']) if state.get('first_day') else None
+    high_water_mark = date.fromisoformat(state['high_water_mark']) if state.get('high_water_mark') else None
+    backfill_from = date.fromisoformat(backfill_from) if backfill_from else None
+
+    # Each range is fetched with its own query: days before the first ingested day, then the recent days
+    ranges = []
+    if high_water_mark is None:
+        first_day = backfill_from or (today - timedelta(days=1)).replace(day=1)
+        ranges.append((first_day, end))
+    else:
+        if backfill_from and backfill_from < first_day:
+            ranges.append((backfill_from, first_day))
+        # Already ingested through yesterday: recent days are restated with the next new day
+        if high_water_mark + timedelta(days=1) < end:
+            ranges.append((max(first_day, high_water_mark + timedelta(days=1 - RESTATE_DAYS)), end))
+        first_day = min(first_day, backfill_from or first_day)
+    ranges = [(start, range_end) for start, range_end in ranges if start < range_end]
+
+    report = {
+        'fetched_ranges': [],
+        'rows': 0,
+        'api_requests': 0,
+        'partitions_written': [],
+        'first_day': first_day.isoformat(),
+        'high_water_mark': high_water_mark.isoformat() if high_water_mark else None
+    }
+    if not ranges:
+        logger.info(f"Daily costs are up to date through {report['high_water_mark']}")
+        return report
+
+    for start, range_end in ranges:
+        ingest_range(fetch_pages, store, start, range_end, report)
+        if range_end == end:
+            high_water_mark = end - timedelta(days=1)
+
+    # The mark only moves once every partition is written, so a failed run is simply repeated
+    store.write_state({
+        'group_by': store.group_by,
+        'first_day': first_day.isoformat(),
+        'high_water_mark': high_water_mark.isoformat(),
+        'updated_at': datetime.now(timezone.utc).isoformat()
+    })
+    report['high_water_mark'] = high_water_mark.isoformat()
+    return report
+
+def ingest_range(fetch_pages, store, start, end, report):
+    """Fetch the days start..end-1 with one query and replace them in the store"""
+    query = {
+        'TimePeriod': {'Start': start.isoformat(), 'End': end.isoformat()},
+        'Granularity': 'DAILY',
+        'Metrics': list(METRICS),
+        'GroupBy': [{'Type': 'DIMENSION', 'Key': store.group_by}]
+    }
+    logger.info(f"Ingesting daily costs from {start} to {end}")
+
+    def counted_pages():
+        for page in fetch_pages(query):
+            report['api_requests'] += 1
+            yield page
+
+    # Group the fetched rows by month partition; every month in the range is rewritten, even without rows
+    by_month = {}
+    for row in rows_from_pages(counted_pages()):
+        by_month.setdefault(date.fromisoformat(row['date']).replace(day=1), []).append(row)
+        report['rows'] += 1
+
+    for month in month_starts(start, end):
+        month_end = (month + timedelta(days=32)).replace(day=1)
+        store.merge_days(month, max(start, month), min(end, month_end), by_month.pop(month, []))
+        report['partitions_written'].append(store.partition_key(month))
+    report['fetched_ranges'].append(f"{start} to {end}")
+
+def summarize_rows(rows, start, end, top=10):
+    """Totals by group, month and day for stored daily cost rows"""
+    by_group = {}
+    by_month = {}
+    by_day = {}
+    currency = 'USD'
+    for row in rows:
+        cost = row['BlendedCost']
+        currency = row.get('currency', currency)
+        by_group[row['group']] = by_group.get(row['group'], 0.0) + cost
+        by_month[row['date'][:7]] = by_month.get(row['date'][:7], 0.0) + cost
+        by_day[row['date']] = by_day.get(row['date'], 0.0) + cost
+
+    total_cost = sum(by_group.values())
+    sorted_groups = sorted(by_group.items(), key=lambda x: x[1], reverse=True)
+    return {
+        'total_cost': round(total_cost, 2),
+        'currency': currency,
+        'period': f"{start} to {end}",
+        'days_with_costs': len(by_day),
+        'by_month': {month: round(cost, 2) for month, cost in sorted(by_month.items())},
+        'top_groups': [
+            {
+                'group': group,
+                'cost': round(cost, 2),
+                'percentage': round((cost / total_cost * 100) if total_cost > 0 else 0, 1)
+            }
+            for group, cost in sorted_groups[:top]
+        ]
+    }
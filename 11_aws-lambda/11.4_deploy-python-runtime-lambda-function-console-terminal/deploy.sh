@@ -146,7 +146,7 @@ echo "✅ Dependencies installed successfully"
 
 # Copy function code
 echo "📋 Copying function code..."
-cp lambda_function.py package/
+cp lambda_function.py ce_cache.py cost_ingest.py package/
 
 # Create deployment package
 echo "🗜️  Creating deployment package..."
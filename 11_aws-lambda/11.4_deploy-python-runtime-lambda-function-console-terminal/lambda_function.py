@@ -1,12 +1,19 @@
 import json
+import os
 import boto3
 from datetime import datetime, timezone, timedelta
 import logging
+from ce_cache import CostExplorerCache, S3CacheBackend
+from cost_ingest import DailyCostStore, ingest_daily_costs, summarize_rows
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Bucket for cached Cost Explorer responses (defaults to the event's bucket_name)
+CE_CACHE_BUCKET = os.environ.get('CE_CACHE_BUCKET')
+CE_CACHE_PREFIX = os.environ.get('CE_CACHE_PREFIX', 'ce-cache/')
+
 def lambda_handler(event, context):
     """
     Lambda function that demonstrates working with AWS Cost Explorer API.
@@ -21,6 +28,8 @@ def lambda_handler(event, context):
         bucket_name = event.get('bucket_name')
         granularity = event.get('granularity', 'MONTHLY')  # DAILY, MONTHLY
         group_by = event.get('group_by', 'SERVICE')  # SERVICE, DIMENSION, etc.
+        use_cache = event.get('use_cache', True)
+        mode = event.get('mode', 'snapshot')  # snapshot, ingest, lookup
         
         if not bucket_name:
             raise ValueError("bucket_name is required in the event")
@@ -29,6 +38,11 @@ def lambda_handler(event, context):
         ce_client = boto3.client('ce')  # Cost Explorer
         s3_client = boto3.client('s3')
         
+        if mode == 'ingest':
+            return ingest_handler(event, ce_client, s3_client, bucket_name, group_by)
+        if mode == 'lookup':
+            return lookup_handler(event, s3_client, bucket_name, group_by)
+        
         # Calculate date range for current month
         now = datetime.now(timezone.utc)
         start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -49,26 +63,40 @@ def lambda_handler(event, context):
         
         logger.info(f"Querying Cost Explorer from {start_date_str} to {end_date_str}")
         
-        # Call Cost Explorer API
-        response = ce_client.get_cost_and_usage(
-            TimePeriod={
+        query = {
+            'TimePeriod': {
                 'Start': start_date_str,
                 'End': end_date_str
             },
-            Granularity=granularity,
-            Metrics=['BlendedCost', 'UnblendedCost', 'UsageQuantity'],
-            GroupBy=[
+            'Granularity': granularity,
+            'Metrics': ['BlendedCost', 'UnblendedCost', 'UsageQuantity'],
+            'GroupBy': [
                 {
                     'Type': 'DIMENSION',
                     'Key': group_by
                 }
             ]
-        )
+        }
         
-        logger.info("Successfully retrieved cost data from Cost Explorer")
+        # Call Cost Explorer API, following NextPageToken until every page is read.
+        # Repeated queries are answered from the cache (each API request costs $0.01)
+        cache = None
+        if use_cache:
+            # Cached results are per account, in case several accounts share the bucket
+            account_id = getattr(context, 'invoked_function_arn', '::::').split(':')[4]
+            cache = CostExplorerCache(S3CacheBackend(s3_client, CE_CACHE_BUCKET or bucket_name, CE_CACHE_PREFIX),
+                                      namespace=account_id)
+            pages = cache.pages(query, lambda: fetch_cost_pages(ce_client, **query))
+        else:
+            pages = fetch_cost_pages(ce_client, **query)
+        
+        # Process the cost data one page at a time as it arrives
+        cost_summary = process_cost_data(pages, start_date_str, end_date_str)
         
-        # Process the cost data
-        cost_summary = process_cost_data(response, start_date_str, end_date_str)
+        logger.info(f"Successfully retrieved cost data from Cost Explorer "
+                    f"({cost_summary['detailed_breakdown']['raw_response_summary']['pages']} pages)")
+        if cache:
+            logger.info(f"Cost Explorer cache: {cache.stats()}")
         
         # Add function metadata
         cost_summary['function_info'] = {
@@ -80,7 +108,8 @@ def lambda_handler(event, context):
                 'granularity': granularity,
                 'group_by': group_by,
                 'date_range': f"{start_date_str} to {end_date_str}"
-            }
+            },
+            'cache': cache.stats() if cache else None
         }
         
         # Store in S3
@@ -111,6 +140,7 @@ def lambda_handler(event, context):
                     'group_by': group_by,
                     'date_range': f"{start_date_str} to {end_date_str}"
                 },
+                'cache': cost_summary['function_info']['cache'],
                 'timestamp': cost_summary['function_info']['query_timestamp']
             })
         }
@@ -128,7 +158,9 @@ def lambda_handler(event, context):
                     'required_permissions': [
                         'ce:GetCostAndUsage',
                         'ce:GetDimensionValues',
-                        's3:PutObject'
+                        's3:PutObject',
+                        's3:GetObject',
+                        's3:ListBucket'
                     ]
                 })
             }
@@ -141,65 +173,188 @@ def lambda_handler(event, context):
             })
         }
 
-def process_cost_data(cost_response, start_date, end_date):
+def ingest_handler(event, ce_client, s3_client, bucket_name, group_by):
+    """
+    Append the days since the last run to the daily cost partitions in S3.
+    
+    Only days after the high-water mark (plus a few recent days that Cost
+    Explorer may still revise) are queried, so a daily schedule costs a single
+    small request instead of re-reading the whole month.
+    """
+    store = DailyCostStore(s3_client, bucket_name, group_by)
+    report = ingest_daily_costs(
+        lambda query: fetch_cost_pages(ce_client, **query),
+        store,
+        backfill_from=event.get('backfill_from')
+    )
+    
+    logger.info(f"Daily cost ingestion: {report['rows']} rows, {report['api_requests']} API requests, "
+                f"high-water mark {report['high_water_mark']}")
+    
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': 'Daily cost data ingested successfully' if report['fetched_ranges'] else 'Daily cost data is up to date',
+            's3_location': f"s3://{bucket_name}/{store.prefix}",
+            'ingestion': report,
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        })
+    }
+
+def lookup_handler(event, s3_client, bucket_name, group_by):
+    """
+    Summarize ingested daily costs for a date range without calling Cost Explorer.
+    
+    start_date and end_date (exclusive) default to the current month. One
+    partition is read per month in the range.
+    """
+    today = datetime.now(timezone.utc).date()
+    start_date = event.get('start_date', today.replace(day=1).isoformat())
+    end_date = event.get('end_date', (today + timedelta(days=1)).isoformat())
+    
+    store = DailyCostStore(s3_client, bucket_name, group_by)
+    state = store.read_state()
+    if not state:
+        raise ValueError(f"No daily cost data ingested for group_by={group_by}; run with mode 'ingest' first")
+    
+    # Only months inside the ingested range have partitions to read
+    start = max(datetime.strptime(start_date, '%Y-%m-%d').date(),
+                datetime.strptime(state['first_day'], '%Y-%m-%d').date())
+    end = min(datetime.strptime(end_date, '%Y-%m-%d').date(),
+              datetime.strptime(state['high_water_mark'], '%Y-%m-%d').date() + timedelta(days=1))
+    summary = summarize_rows(store.rows(start, end), start_date, end_date)
+    
+    logger.info(f"Daily cost lookup for {start_date} to {end_date} read {store.partitions_read} partitions")
+    
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': 'Daily cost data read from partitions',
+            'billing_summary': summary,
+            # Days outside the ingested range are missing from the totals
+            'coverage': {
+                'first_day': state['first_day'],
+                'high_water_mark': state['high_water_mark']
+            },
+            'partitions_read': store.partitions_read,
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        })
+    }
+
+def fetch_cost_pages(ce_client, **query):
     """
-    Process the Cost Explorer API response into a structured summary.
+    Yield every page of get_cost_and_usage results for a query.
+    
+    Cost Explorer splits large results (many groups such as LINKED_ACCOUNT or
+    USAGE_TYPE, or DAILY granularity over long ranges) across pages. Each page
+    but the last carries a NextPageToken, which is passed back to get the next one.
     """
+    next_page_token = None
+    while True:
+        if next_page_token:
+            page = ce_client.get_cost_and_usage(NextPageToken=next_page_token, **query)
+        else:
+            page = ce_client.get_cost_and_usage(**query)
+        yield page
+        next_page_token = page.get('NextPageToken')
+        if not next_page_token:
+            break
+
+class CostAggregator:
+    """
+    Running cost totals built from Cost Explorer pages.
     
-    results_by_time = cost_response.get('ResultsByTime', [])
+    Only the totals per group and per time period are kept, so pages can be
+    processed and discarded one at a time and memory does not grow with the
+    number of pages. A time period can be split across pages, so its total is
+    taken from the API's Total once, or summed from its groups when Total is
+    not reported (as with most grouped queries).
+    """
     
-    total_cost = 0.0
-    currency = 'USD'  # Default
-    service_costs = {}
+    def __init__(self):
+        self.currency = 'USD'  # Default
+        self.service_costs = {}
+        self.periods = set()
+        self.period_totals = {}
+        self.period_group_costs = {}
+        self.pages = 0
+        self.total_groups = 0
     
-    # Process each time period (usually just one for monthly)
-    for time_period in results_by_time:
-        period_start = time_period.get('TimePeriod', {}).get('Start')
-        period_end = time_period.get('TimePeriod', {}).get('End')
+    def add_page(self, cost_response):
+        self.pages += 1
         
-        # Get total cost for this period
-        period_total = float(time_period.get('Total', {}).get('BlendedCost', {}).get('Amount', 0))
-        total_cost += period_total
+        for time_period in cost_response.get('ResultsByTime', []):
+            period_start = time_period.get('TimePeriod', {}).get('Start')
+            self.periods.add(period_start)
+            
+            # Get total cost for this period (reported on every page the period appears on)
+            period_total = time_period.get('Total', {}).get('BlendedCost')
+            if period_total and period_start not in self.period_totals:
+                self.period_totals[period_start] = float(period_total.get('Amount', 0))
+                # Get currency (should be consistent)
+                self.currency = period_total.get('Unit', self.currency)
+            
+            # Process groups (services)
+            groups = time_period.get('Groups', [])
+            self.total_groups += len(groups)
+            for group in groups:
+                service_name = group.get('Keys', ['Unknown'])[0]
+                service_cost = float(group.get('Metrics', {}).get('BlendedCost', {}).get('Amount', 0))
+                
+                self.service_costs[service_name] = self.service_costs.get(service_name, 0.0) + service_cost
+                self.period_group_costs[period_start] = self.period_group_costs.get(period_start, 0.0) + service_cost
+    
+    @property
+    def total_cost(self):
+        return sum(
+            self.period_totals[period] if period in self.period_totals else self.period_group_costs.get(period, 0.0)
+            for period in self.periods
+        )
+    
+    def summary(self, start_date, end_date):
+        total_cost = self.total_cost
         
-        # Get currency (should be consistent)
-        currency = time_period.get('Total', {}).get('BlendedCost', {}).get('Unit', 'USD')
+        # Sort services by cost (descending)
+        sorted_services = sorted(self.service_costs.items(), key=lambda x: x[1], reverse=True)
         
-        # Process groups (services)
-        for group in time_period.get('Groups', []):
-            service_name = group.get('Keys', ['Unknown'])[0]
-            service_cost = float(group.get('Metrics', {}).get('BlendedCost', {}).get('Amount', 0))
-            
-            if service_name in service_costs:
-                service_costs[service_name] += service_cost
-            else:
-                service_costs[service_name] = service_cost
-    
-    # Sort services by cost (descending)
-    sorted_services = sorted(service_costs.items(), key=lambda x: x[1], reverse=True)
-    
-    # Create summary
-    summary = {
-        'summary': {
-            'total_cost': round(total_cost, 2),
-            'currency': currency,
-            'period': f"{start_date} to {end_date}",
-            'service_count': len(service_costs),
-            'top_services': [
-                {
-                    'service': service,
-                    'cost': round(cost, 2),
-                    'percentage': round((cost / total_cost * 100) if total_cost > 0 else 0, 1)
+        # Create summary
+        return {
+            'summary': {
+                'total_cost': round(total_cost, 2),
+                'currency': self.currency,
+                'period': f"{start_date} to {end_date}",
+                'service_count': len(self.service_costs),
+                'top_services': [
+                    {
+                        'service': service,
+                        'cost': round(cost, 2),
+                        'percentage': round((cost / total_cost * 100) if total_cost > 0 else 0, 1)
+                    }
+                    for service, cost in sorted_services
+                ]
+            },
+            'detailed_breakdown': {
+                'by_service': dict(sorted_services),
+                'raw_response_summary': {
+                    'time_periods': len(self.periods),
+                    'total_groups': self.total_groups,
+                    'pages': self.pages
                 }
-                for service, cost in sorted_services
-            ]
-        },
-        'detailed_breakdown': {
-            'by_service': dict(sorted_services),
-            'raw_response_summary': {
-                'time_periods': len(results_by_time),
-                'total_groups': sum(len(tp.get('Groups', [])) for tp in results_by_time)
             }
         }
-    }
+
+def process_cost_data(cost_response, start_date, end_date):
+    """
+    Process Cost Explorer results into a structured summary.
+    
+    Accepts a single get_cost_and_usage response or an iterable of pages
+    (such as fetch_cost_pages); pages are aggregated one at a time.
+    """
+    
+    pages = [cost_response] if isinstance(cost_response, dict) else cost_response
+    
+    aggregator = CostAggregator()
+    for page in pages:
+        aggregator.add_page(page)
     
-    return summary
+    return aggregator.summary(start_date, end_date)
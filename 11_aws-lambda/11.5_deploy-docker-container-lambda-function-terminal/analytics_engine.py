@@ -0,0 +1,285 @@
+"""
+Columnar analytics engine for the container Lambda function.
+Loads sales records into column arrays once and computes every total and
+group-by in a single vectorized pass with NumPy. pandas DataFrames are accepted
+directly, and a single-pass pure Python fallback is used when NumPy is missing.
+
+Partial results can be exported as mergeable state. Revenue is kept in integer
+cents there, so merging is exact and gives the same totals in any order.
+Optional sketches add approximate distinct customers and order-value percentiles.
+"""
+
+from operator import itemgetter
+
+from sketches import HyperLogLog, TDigest, merge_sketch_dicts, sketch_from_dict
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure Python path gives the same output
+    np = None
+
+def load_sales_columns(records):
+    """
+    Convert sales records into column arrays
+
+    Products and regions are encoded as integer codes in order of first appearance,
+    which keeps the group-by output in the same order as the original dict loops.
+    Accepts a list of dicts, a pandas DataFrame or a generated SalesBatch.
+    """
+    if hasattr(records, 'coded_columns'):
+        # Generated batches are already columnar
+        return records.coded_columns()
+
+    if hasattr(records, 'columns'):
+        # pandas DataFrame: factorize without sorting to keep first-appearance order
+        import pandas as pd
+        product_codes, products = pd.factorize(records['product'], sort=False)
+        region_codes, regions = pd.factorize(records['region'], sort=False)
+        return {
+            'product_codes': product_codes,
+            'products': list(products),
+            'region_codes': region_codes,
+            'regions': list(regions),
+            'quantity': records['quantity'].to_numpy(dtype=np.int64),
+            'total_amount': records['total_amount'].to_numpy(dtype=np.float64)
+        }
+
+    count = len(records)
+    product_codes, products = encode_categories(records, 'product')
+    region_codes, regions = encode_categories(records, 'region')
+    return {
+        'product_codes': product_codes,
+        'products': products,
+        'region_codes': region_codes,
+        'regions': regions,
+        # map(itemgetter) feeds fromiter directly, without an intermediate list
+        'quantity': np.fromiter(map(itemgetter('quantity'), records), dtype=np.int64, count=count),
+        'total_amount': np.fromiter(map(itemgetter('total_amount'), records), dtype=np.float64, count=count)
+    }
+
+def encode_categories(records, field):
+    """Integer codes for a string field, numbered in order of first appearance"""
+    values = list(map(itemgetter(field), records))
+    names = list(dict.fromkeys(values))
+    lookup = {name: code for code, name in enumerate(names)}
+    return np.fromiter(map(lookup.__getitem__, values), dtype=np.intp, count=len(values)), names
+
+def _group_stats(codes, names, quantity, total_amount):
+    """Revenue, quantity and order counts per group using bincount"""
+    size = len(names)
+    revenue = np.bincount(codes, weights=total_amount, minlength=size)
+    units = np.bincount(codes, weights=quantity, minlength=size)
+    orders = np.bincount(codes, minlength=size)
+    return {
+        name: {'revenue': float(revenue[i]), 'quantity': int(units[i]), 'orders': int(orders[i])}
+        for i, name in enumerate(names)
+    }
+
+def _build_sales_result(count, total_revenue, total_quantity, product_stats, region_stats):
+    """Assemble the analytics document in the schema returned by perform_analytics"""
+    avg_order_value = total_revenue / count if count else 0
+    return {
+        'summary': {
+            'total_records': count,
+            'data_type': 'sales'
+        },
+        'key_metrics': {
+            'total_revenue': round(total_revenue, 2),
+            'average_order_value': round(avg_order_value, 2),
+            'total_quantity_sold': total_quantity
+        },
+        'by_product': product_stats,
+        'by_region': region_stats
+    }
+
+def sales_partials_python(records):
+    """Single-pass pure Python version used when NumPy is not installed"""
+    total_revenue = 0.0
+    total_quantity = 0
+    product_stats = {}
+    region_stats = {}
+    for item in records:
+        amount = item['total_amount']
+        quantity = item['quantity']
+        total_revenue += amount
+        total_quantity += quantity
+        group = product_stats.get(item['product'])
+        if group is None:
+            group = product_stats[item['product']] = {'revenue': 0, 'quantity': 0, 'orders': 0}
+        group['revenue'] += amount
+        group['quantity'] += quantity
+        group['orders'] += 1
+        group = region_stats.get(item['region'])
+        if group is None:
+            group = region_stats[item['region']] = {'revenue': 0, 'quantity': 0, 'orders': 0}
+        group['revenue'] += amount
+        group['quantity'] += quantity
+        group['orders'] += 1
+    return len(records), total_revenue, total_quantity, product_stats, region_stats
+
+def sales_partials(records):
+    """Unrounded count, totals and group stats for a batch of sales records"""
+    if np is None:
+        return sales_partials_python(records)
+
+    return column_partials(load_sales_columns(records))
+
+def column_partials(columns):
+    """sales_partials for columns already returned by load_sales_columns"""
+    quantity = columns['quantity']
+    total_amount = columns['total_amount']
+    return (
+        len(quantity),
+        float(total_amount.sum()),
+        int(quantity.sum()),
+        _group_stats(columns['product_codes'], columns['products'], quantity, total_amount),
+        _group_stats(columns['region_codes'], columns['regions'], quantity, total_amount)
+    )
+
+def sales_analytics(records):
+    """Compute sales totals and per-product/per-region breakdowns"""
+    return _build_sales_result(*sales_partials(records))
+
+def _merge_groups(target, source):
+    for name, stats in source.items():
+        group = target.get(name)
+        if group is None:
+            target[name] = dict(stats)
+        else:
+            group['revenue'] += stats['revenue']
+            group['quantity'] += stats['quantity']
+            group['orders'] += stats['orders']
+
+class SalesAggregator:
+    """
+    Accumulate sales analytics chunk by chunk
+
+    Only the running totals are kept, so records can be generated, aggregated and
+    discarded one chunk at a time with flat memory use. With sketches enabled,
+    distinct customer_id values and total_amount quantiles are tracked too, in
+    a fixed few kilobytes however many records are added.
+    """
+
+    def __init__(self, sketches=False):
+        self.count = 0
+        self.total_revenue = 0.0
+        self.total_quantity = 0
+        self.by_product = {}
+        self.by_region = {}
+        self.sketches = {'customers': HyperLogLog(), 'order_values': TDigest()} if sketches else None
+
+    def add(self, records):
+        count, revenue, quantity, by_product, by_region = sales_partials(records)
+        self.count += count
+        self.total_revenue += revenue
+        self.total_quantity += quantity
+        _merge_groups(self.by_product, by_product)
+        _merge_groups(self.by_region, by_region)
+        if self.sketches:
+            if hasattr(records, 'sketch_values'):
+                # Generated batches supply the values from their columns, without record dicts
+                customers, order_values = records.sketch_values()
+            else:
+                customers = map(itemgetter('customer_id'), records)
+                order_values = map(itemgetter('total_amount'), records)
+            self.sketches['customers'].add_many(customers)
+            self.sketches['order_values'].add_many(order_values)
+
+    def result(self):
+        result = _build_sales_result(self.count, self.total_revenue, self.total_quantity,
+                                     self.by_product, self.by_region)
+        if self.sketches:
+            result['approximate'] = sketch_metrics(self.sketches)
+        return result
+
+    def partials(self):
+        """Mergeable state for this aggregator, with revenue in integer cents"""
+        return {
+            'count': self.count,
+            'revenue_cents': to_cents(self.total_revenue),
+            'quantity': self.total_quantity,
+            'by_product': {name: _group_partials(stats) for name, stats in self.by_product.items()},
+            'by_region': {name: _group_partials(stats) for name, stats in self.by_region.items()},
+            **({'sketches': {name: sketch.to_dict() for name, sketch in self.sketches.items()}} if self.sketches else {})
+        }
+
+def sketch_metrics(sketches):
+    """Approximate metrics from the customer and order-value sketches"""
+    order_values = sketches['order_values']
+    return {
+        'distinct_customers': sketches['customers'].estimate(),
+        'order_value_percentiles': {
+            f"p{round(q * 100)}": round(order_values.quantile(q), 2) if order_values.count else None
+            for q in (0.5, 0.9, 0.95, 0.99)
+        }
+    }
+
+def to_cents(amount):
+    return int(round(amount * 100))
+
+def _group_partials(stats):
+    return {'revenue_cents': to_cents(stats['revenue']), 'quantity': stats['quantity'], 'orders': stats['orders']}
+
+def empty_partials():
+    return {'count': 0, 'revenue_cents': 0, 'quantity': 0, 'by_product': {}, 'by_region': {}}
+
+def merge_partials(left, right):
+    """
+    Combine two partial states into a new one
+
+    Every field is an integer sum, so the merge is commutative and associative:
+    batches folded in any order produce identical state.
+    """
+    merged = {
+        'count': left['count'] + right['count'],
+        'revenue_cents': left['revenue_cents'] + right['revenue_cents'],
+        'quantity': left['quantity'] + right['quantity']
+    }
+    for groups in ('by_product', 'by_region'):
+        combined = {}
+        for name in sorted(set(left[groups]) | set(right[groups])):
+            a = left[groups].get(name, {})
+            b = right[groups].get(name, {})
+            combined[name] = {
+                field: a.get(field, 0) + b.get(field, 0)
+                for field in ('revenue_cents', 'quantity', 'orders')
+            }
+        merged[groups] = combined
+    if 'sketches' in left or 'sketches' in right:
+        merged['sketches'] = merge_sketches(left.get('sketches', {}), right.get('sketches', {}))
+    return merged
+
+def merge_sketches(left, right):
+    """
+    Merge serialized sketches by name
+
+    HyperLogLog merges are exact (register-wise max), so distinct counts do not
+    depend on merge order; t-digest merges stay within its usual error bounds.
+    """
+    merged = {}
+    for name in sorted(set(left) | set(right)):
+        if name in left and name in right:
+            merged[name] = merge_sketch_dicts(left[name], right[name])
+        else:
+            merged[name] = left.get(name) or right.get(name)
+    return merged
+
+def sales_result_from_partials(partials):
+    """Analytics document, in the perform_analytics schema, for a partial state"""
+    def groups(stats):
+        return {
+            name: {'revenue': group['revenue_cents'] / 100, 'quantity': group['quantity'], 'orders': group['orders']}
+            for name, group in sorted(stats.items())
+        }
+    result = _build_sales_result(
+        partials['count'],
+        partials['revenue_cents'] / 100,
+        partials['quantity'],
+        groups(partials['by_product']),
+        groups(partials['by_region'])
+    )
+    if partials.get('sketches'):
+        result['approximate'] = sketch_metrics(
+            {name: sketch_from_dict(data) for name, data in partials['sketches'].items()}
+        )
+    return result
@@ -0,0 +1,233 @@
+"""
+Persistent, mergeable analytics state for the container Lambda function.
+Each invocation folds its batch partials into a running state instead of
+re-reading earlier raw data. Every batch is applied at most once, keyed by its
+batch id, and merging is order-independent, so concurrent or retried
+invocations still converge on the same totals.
+"""
+
+import json
+import logging
+import os
+import random
+import time
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+
+from analytics_engine import empty_partials, merge_partials, merge_sketches
+
+logger = logging.getLogger(__name__)
+
+# Optimistic-concurrency retries for the S3 read-modify-write cycle
+MAX_CONFLICT_RETRIES = 10
+CONFLICT_ERRORS = ('PreconditionFailed', 'ConditionalRequestConflict')
+
+# Most recent batch ids kept in the S3 state for de-duplication. Retries arrive
+# within minutes, so a bounded window keeps the object (and every conditional
+# read-modify-write) from growing with the life of the state
+STATE_DEDUP_WINDOW = int(os.environ.get('ANALYTICS_STATE_DEDUP_WINDOW', '1000'))
+
+# Group fields stored per product or region
+GROUP_FIELDS = ('revenue_cents', 'quantity', 'orders')
+
+class S3StateStore:
+    """
+    Keep the state as one JSON object in S3
+
+    Updates use conditional writes (If-Match on the ETag, or If-None-Match for
+    the first write), so two invocations can never overwrite each other's
+    batches. On a conflict the state is re-read and the fold retried.
+
+    Only the last dedup_window batch ids are kept, so a batch is applied at
+    most once as long as it is retried before that many newer batches land.
+    """
+
+    def __init__(self, s3_client, bucket, key, dedup_window=STATE_DEDUP_WINDOW):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.dedup_window = dedup_window
+        self.uri = f"s3://{bucket}/{key}"
+
+    def load(self):
+        """Current state and its ETag; an empty state and None if nothing is stored yet"""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=self.key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return dict(empty_partials(), batches=0, batch_ids=[]), None
+            raise
+        return json.loads(response['Body'].read()), response['ETag']
+
+    def fold(self, batch_id, partials):
+        """Merge one batch into the stored state; returns the resulting state"""
+        for attempt in range(MAX_CONFLICT_RETRIES):
+            state, etag = self.load()
+            if batch_id in state['batch_ids']:
+                logger.info(f"Batch {batch_id} already applied to {self.uri}")
+                return state
+
+            merged = merge_partials(state, partials)
+            merged['batch_ids'] = (state['batch_ids'] + [batch_id])[-self.dedup_window:]
+            merged['batches'] = state['batches'] + 1
+            merged['updated_at'] = datetime.now(timezone.utc).isoformat()
+            condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+            try:
+                self.s3_client.put_object(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    Body=json.dumps(merged, separators=(',', ':')),
+                    ContentType='application/json',
+                    **condition
+                )
+                return merged
+            except ClientError as e:
+                if e.response['Error']['Code'] not in CONFLICT_ERRORS:
+                    raise
+                logger.info(f"State update conflict on {self.uri}, retrying (attempt {attempt + 1})")
+                time.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+
+        raise RuntimeError(f"Could not update {self.uri} after {MAX_CONFLICT_RETRIES} conflicting writes")
+
+class DynamoDBStateStore:
+    """
+    Keep the state as counters on one DynamoDB item
+
+    Each fold is a single transaction: a marker item for the batch id, which
+    must not already exist, plus atomic ADDs to the state counters. ADD is
+    commutative, so concurrent folds need no locking or retries. The table
+    needs a string partition key named pk.
+
+    Sketches cannot be updated with ADD, so they live on a separate item and
+    are merged with a version-checked read-modify-write after the counters.
+    That item keeps its own list of recent batch ids, written in the same
+    conditional put as the merge. A retry of a batch whose counters were
+    applied, but whose sketch merge never landed, still merges the sketches
+    exactly once.
+    """
+
+    def __init__(self, dynamodb_client, table_name, state_name):
+        self.dynamodb_client = dynamodb_client
+        self.table_name = table_name
+        self.state_name = state_name
+        self.uri = f"dynamodb://{table_name}/{state_name}"
+
+    def fold(self, batch_id, partials):
+        """Merge one batch into the stored state; returns the resulting state"""
+        counters = {
+            'count': partials['count'],
+            'revenue_cents': partials['revenue_cents'],
+            'quantity': partials['quantity'],
+            'batches': 1
+        }
+        for groups, prefix in (('by_product', 'product'), ('by_region', 'region')):
+            for name, stats in partials[groups].items():
+                for field in GROUP_FIELDS:
+                    counters[f"{prefix}|{name}|{field}"] = stats[field]
+
+        names = {f"#a{i}": attribute for i, attribute in enumerate(counters)}
+        values = {f":v{i}": {'N': str(value)} for i, value in enumerate(counters.values())}
+        values[':updated'] = {'S': datetime.now(timezone.utc).isoformat()}
+        names['#updated'] = 'updated_at'
+        update_expression = 'ADD ' + ', '.join(f"#a{i} :v{i}" for i in range(len(counters))) + ' SET #updated = :updated'
+
+        try:
+            self.dynamodb_client.transact_write_items(TransactItems=[
+                {'Put': {
+                    'TableName': self.table_name,
+                    'Item': {
+                        'pk': {'S': f"{self.state_name}#batch#{batch_id}"},
+                        'applied_at': {'S': datetime.now(timezone.utc).isoformat()}
+                    },
+                    'ConditionExpression': 'attribute_not_exists(pk)'
+                }},
+                {'Update': {
+                    'TableName': self.table_name,
+                    'Key': {'pk': {'S': self.state_name}},
+                    'UpdateExpression': update_expression,
+                    'ExpressionAttributeNames': names,
+                    'ExpressionAttributeValues': values
+                }}
+            ])
+        except ClientError as e:
+            reasons = e.response.get('CancellationReasons', [])
+            if not (reasons and reasons[0].get('Code') == 'ConditionalCheckFailed'):
+                raise
+            logger.info(f"Batch {batch_id} already applied to {self.uri}")
+
+        # Also on the already-applied path: the earlier attempt may have stopped before its sketches
+        if partials.get('sketches'):
+            self._fold_sketches(batch_id, partials['sketches'])
+
+        return self.load()
+
+    def _fold_sketches(self, batch_id, sketches):
+        key = {'pk': {'S': f"{self.state_name}#sketches"}}
+        for attempt in range(MAX_CONFLICT_RETRIES):
+            item = self.dynamodb_client.get_item(TableName=self.table_name, Key=key, ConsistentRead=True).get('Item')
+            batch_ids = [value['S'] for value in item.get('batch_ids', {}).get('L', [])] if item else []
+            if batch_id in batch_ids:
+                logger.info(f"Sketches for batch {batch_id} already applied to {self.uri}")
+                return
+            batch_ids = (batch_ids + [batch_id])[-STATE_DEDUP_WINDOW:]
+            if item:
+                version = int(item['version']['N'])
+                merged = merge_sketches(json.loads(item['sketches']['S']), sketches)
+                condition = {
+                    'ConditionExpression': '#version = :version',
+                    'ExpressionAttributeNames': {'#version': 'version'},
+                    'ExpressionAttributeValues': {':version': {'N': str(version)}}
+                }
+            else:
+                version = 0
+                merged = sketches
+                condition = {'ConditionExpression': 'attribute_not_exists(pk)'}
+            try:
+                self.dynamodb_client.put_item(
+                    TableName=self.table_name,
+                    Item={
+                        **key,
+                        'sketches': {'S': json.dumps(merged, separators=(',', ':'))},
+                        'batch_ids': {'L': [{'S': applied} for applied in batch_ids]},
+                        'version': {'N': str(version + 1)}
+                    },
+                    **condition
+                )
+                return
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                logger.info(f"Sketch update conflict on {self.uri}, retrying (attempt {attempt + 1})")
+                time.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+
+        raise RuntimeError(f"Could not update sketches on {self.uri} after {MAX_CONFLICT_RETRIES} conflicting writes")
+
+    def load(self):
+        """Read the counters back into the partials layout"""
+        item = self.dynamodb_client.get_item(
+            TableName=self.table_name,
+            Key={'pk': {'S': self.state_name}},
+            ConsistentRead=True
+        ).get('Item', {})
+        sketch_item = self.dynamodb_client.get_item(
+            TableName=self.table_name,
+            Key={'pk': {'S': f"{self.state_name}#sketches"}},
+            ConsistentRead=True
+        ).get('Item')
+
+        state = dict(empty_partials(), batches=0)
+        for attribute, value in item.items():
+            if 'N' not in value:
+                continue
+            number = int(value['N'])
+            if '|' in attribute:
+                prefix, rest = attribute.split('|', 1)
+                name, field = rest.rsplit('|', 1)
+                groups = state['by_product'] if prefix == 'product' else state['by_region']
+                groups.setdefault(name, dict.fromkeys(GROUP_FIELDS, 0))[field] = number
+            else:
+                state[attribute] = number
+        if sketch_item:
+            state['sketches'] = json.loads(sketch_item['sketches']['S'])
+        return state
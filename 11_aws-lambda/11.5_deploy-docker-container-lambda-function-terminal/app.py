@@ -1,15 +1,56 @@
 import json
-import boto3
-import requests
 from datetime import datetime, timezone
 import logging
+import math
 import os
-import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+from analytics_engine import SalesAggregator, merge_partials, sales_analytics, sales_result_from_partials
+from data_generator import inventory_records, sales_batches
+from output_writers import NdjsonWriter, ParquetRecordWriter
+
+# boto3, requests and multiprocessing are imported where they are used: together
+# they are most of the init time, and local tests and some data types never need them.
+# Run cold_start_budget.py to see the per-module import cost.
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sales records are generated, aggregated and uploaded this many at a time
+SALES_CHUNK_SIZE = int(os.environ.get('SALES_CHUNK_SIZE', '50000'))
+# Number of distinct customers that generated sales are drawn from
+SALES_CUSTOMER_POOL = int(os.environ.get('SALES_CUSTOMER_POOL', '1000000'))
+# Records are seeded in fixed blocks, so any block can be generated on its own
+SALES_SEED_BLOCK = 10000
+# Worker processes for sales analytics; 'auto' uses every available vCPU
+SALES_WORKERS = os.environ.get('SALES_WORKERS', '1')
+
+# External API test settings; endpoints can also be passed in the event as api_endpoints
+API_TEST_ENDPOINTS = [url.strip() for url in os.environ.get('API_TEST_ENDPOINTS', 'https://httpbin.org/json').split(',') if url.strip()]
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', '10'))
+HTTP_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', '3'))
+
+# Reused across warm invocations so connections (and TLS sessions) stay open
+_http_session = None
+
+# AWS clients, created on first use and reused across warm invocations
+_aws_clients = {}
+
+# Running sales state across invocations: 's3' or 'dynamodb' (off unless set here or in the event)
+ANALYTICS_STATE_BACKEND = os.environ.get('ANALYTICS_STATE_BACKEND')
+ANALYTICS_STATE_TABLE = os.environ.get('ANALYTICS_STATE_TABLE')
+# Approximate distinct customers and order-value percentiles for sales
+ANALYTICS_SKETCHES = os.environ.get('ANALYTICS_SKETCHES', 'false').lower() == 'true'
+
+# Raw data writers by output_format
+RAW_WRITERS = {
+    'ndjson': NdjsonWriter,
+    'parquet': ParquetRecordWriter
+}
+
 def lambda_handler(event, context):
     """
     Lambda function deployed as container image.
@@ -29,17 +70,51 @@ def lambda_handler(event, context):
         data_type = event.get('data_type', 'sales')
         output_bucket = event.get('output_bucket')
         record_count = event.get('record_count', 100)
+        output_format = event.get('output_format', 'ndjson')
+        state_backend = event.get('state_backend', ANALYTICS_STATE_BACKEND)
         
         if not output_bucket:
             raise ValueError("output_bucket is required in the event")
+        if output_format not in RAW_WRITERS:
+            raise ValueError(f"Unsupported output_format: {output_format}")
+        if state_backend not in (None, 's3', 'dynamodb'):
+            raise ValueError(f"Unsupported state_backend: {state_backend}")
         
-        # Generate sample data based on type
         if data_type == 'sales':
-            data = generate_sales_data(record_count)
-        elif data_type == 'inventory':
-            data = generate_inventory_data()
+            # Sales data is streamed in chunks so peak memory stays flat for any record_count
+            s3_client = None if is_local_test else get_aws_client('s3')
+            workers = resolve_workers(event.get('workers', SALES_WORKERS), record_count)
+            options = {
+                'seed': event.get('seed', 42),
+                'output_format': output_format,
+                'sketches': event.get('sketches', ANALYTICS_SKETCHES)
+            }
+            if workers > 1:
+                analytics, partials, s3_results, upload_stats = stream_sales_analytics_sharded(
+                    record_count, output_bucket, workers, s3_client, **options
+                )
+            else:
+                analytics, partials, s3_results, upload_stats = stream_sales_analytics(
+                    record_count, output_bucket, s3_client, **options
+                )
+            
+            cumulative = None
+            if state_backend and is_local_test:
+                logger.info("Local test mode: Skipping analytics state update")
+            elif state_backend:
+                # Retried invocations keep their request id, so a batch is never counted twice
+                batch_id = event.get('batch_id') or context.aws_request_id
+                store = get_state_store(state_backend, output_bucket, event.get('state_name', 'sales'))
+                cumulative = fold_sales_state(store, batch_id, partials)
+            
+            return build_success_response(data_type, analytics, s3_results, context, is_local_test,
+                                          upload_stats, cumulative)
+        
+        # Generate sample data based on type
+        if data_type == 'inventory':
+            data = generate_inventory_data(event.get('seed', 42))
         elif data_type == 'api_test':
-            data = test_external_api()
+            data = test_external_api(event.get('api_endpoints'))
         else:
             raise ValueError(f"Unsupported data_type: {data_type}")
         
@@ -49,45 +124,15 @@ def lambda_handler(event, context):
         analytics = perform_analytics(data, data_type)
         
         # Handle S3 operations (mock for local testing)
+        upload_stats = None
         if is_local_test:
             logger.info("Local test mode: Skipping S3 operations")
-            timestamp = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')
-            s3_results = {
-                'raw_data': f"s3://{output_bucket}/analytics/{data_type}/raw-data-{timestamp}.json",
-                'analytics': f"s3://{output_bucket}/analytics/{data_type}/results-{timestamp}.json"
-            }
+            s3_results = local_output_files(output_bucket, data_type, output_format)
         else:
             # Save results to S3 (real AWS environment)
-            s3_results = save_to_s3(data, analytics, data_type, output_bucket)
+            s3_results, upload_stats = save_to_s3(data, analytics, data_type, output_bucket, output_format)
         
-        # Create context mock for local testing
-        if not hasattr(context, 'function_name'):
-            context = type('MockContext', (), {
-                'function_name': 'local-test-function',
-                'aws_request_id': 'local-test-request-id',
-                'memory_limit_in_mb': 512
-            })()
-        
-        return {
-            'statusCode': 200,
-            'body': json.dumps({
-                'message': 'Analytics processing completed successfully',
-                'data_type': data_type,
-                'records_processed': len(data),
-                'output_files': s3_results,
-                'analytics_summary': {
-                    'total_records': analytics['summary']['total_records'],
-                    'key_metrics': analytics['key_metrics']
-                },
-                'container_info': {
-                    'function_name': context.function_name,
-                    'request_id': context.aws_request_id,
-                    'memory_limit': context.memory_limit_in_mb,
-                    'python_version': os.sys.version.split()[0],
-                    'local_test_mode': is_local_test
-                }
-            })
-        }
+        return build_success_response(data_type, analytics, s3_results, context, is_local_test, upload_stats)
         
     except Exception as e:
         logger.error(f"Function execution failed: {str(e)}")
@@ -100,148 +145,449 @@ def lambda_handler(event, context):
             })
         }
 
-def save_to_s3(data, analytics, data_type, output_bucket):
-    """Save results to S3 (only in real AWS environment)"""
-    s3_client = boto3.client('s3')
-    timestamp = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')
+def get_aws_client(service):
+    """boto3 client for a service, importing boto3 on first use"""
+    if service not in _aws_clients:
+        import boto3
+        _aws_clients[service] = boto3.client(service)
+    return _aws_clients[service]
+
+def build_success_response(data_type, analytics, s3_results, context, is_local_test, upload_stats=None,
+                           cumulative=None):
+    """Build the 200 response returned for every data type"""
+    # Create context mock for local testing
+    if not hasattr(context, 'function_name'):
+        context = type('MockContext', (), {
+            'function_name': 'local-test-function',
+            'aws_request_id': 'local-test-request-id',
+            'memory_limit_in_mb': 512
+        })()
     
-    # Save raw data as JSON
-    json_key = f"analytics/{data_type}/raw-data-{timestamp}.json"
-    s3_client.put_object(
-        Bucket=output_bucket,
-        Key=json_key,
-        Body=json.dumps(data, indent=2, default=str),
-        ContentType='application/json'
-    )
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': 'Analytics processing completed successfully',
+            'data_type': data_type,
+            'records_processed': analytics['summary']['total_records'],
+            'output_files': s3_results,
+            'upload_stats': upload_stats,
+            'cumulative_analytics': cumulative,
+            'analytics_summary': {
+                'total_records': analytics['summary']['total_records'],
+                'key_metrics': analytics['key_metrics'],
+                'approximate': analytics.get('approximate')
+            },
+            'container_info': {
+                'function_name': context.function_name,
+                'request_id': context.aws_request_id,
+                'memory_limit': context.memory_limit_in_mb,
+                'python_version': os.sys.version.split()[0],
+                'local_test_mode': is_local_test
+            }
+        })
+    }
+
+def output_keys(data_type, now, output_format='ndjson'):
+    """
+    S3 keys for the raw data and the analytics document
     
-    # Save analytics results
-    analytics_key = f"analytics/{data_type}/results-{timestamp}.json"
+    Parquet files go under a Hive-style data_type=/dt= layout so Athena can
+    prune partitions; NDJSON keeps the original per-type prefix.
+    """
+    timestamp = now.strftime('%Y%m%d-%H%M%S')
+    if output_format == 'parquet':
+        raw_key = f"analytics/parquet/data_type={data_type}/dt={now.strftime('%Y-%m-%d')}/raw-data-{timestamp}.parquet"
+    else:
+        raw_key = f"analytics/{data_type}/raw-data-{timestamp}.ndjson.gz"
+    return raw_key, f"analytics/{data_type}/results-{timestamp}.json"
+
+def local_output_files(output_bucket, data_type, output_format='ndjson'):
+    """S3 locations reported in local test mode, where nothing is uploaded"""
+    raw_key, analytics_key = output_keys(data_type, datetime.now(timezone.utc), output_format)
+    return {
+        'raw_data': f"s3://{output_bucket}/{raw_key}",
+        'analytics': f"s3://{output_bucket}/{analytics_key}"
+    }
+
+def put_json(s3_client, bucket, key, document):
+    """Upload a compact JSON document; returns its size in bytes"""
+    body = json.dumps(document, separators=(',', ':'), default=str).encode('utf-8')
     s3_client.put_object(
-        Bucket=output_bucket,
-        Key=analytics_key,
-        Body=json.dumps(analytics, indent=2, default=str),
+        Bucket=bucket,
+        Key=key,
+        Body=body,
         ContentType='application/json'
     )
+    return len(body)
+
+class ResultUploader:
+    """
+    Upload the raw records and the analytics document for one run
     
-    logger.info(f"Results saved to S3: {output_bucket}")
+    Raw records are streamed as gzip NDJSON or Parquet through a multipart
+    upload whose parts are sent in the background while records are still
+    being produced.
+    On finish, the last raw part and the analytics document are uploaded
+    concurrently.
+    Only the time spent in write and finish is counted as upload time, so the
+    reported throughput excludes data generation and aggregation.
+    """
     
-    return {
-        'raw_data': f"s3://{output_bucket}/{json_key}",
-        'analytics': f"s3://{output_bucket}/{analytics_key}"
-    }
+    def __init__(self, s3_client, output_bucket, data_type, output_format='ndjson'):
+        self.s3_client = s3_client
+        self.output_bucket = output_bucket
+        self.upload_seconds = 0.0
+        self.raw_key, self.analytics_key = output_keys(data_type, datetime.now(timezone.utc), output_format)
+        self.raw_writer = RAW_WRITERS[output_format](s3_client, output_bucket, self.raw_key)
+    
+    def write(self, records):
+        started = time.perf_counter()
+        self.raw_writer.write(records)
+        self.upload_seconds += time.perf_counter() - started
+    
+    def abort(self):
+        self.raw_writer.abort()
+    
+    def _put_analytics(self, analytics):
+        return put_json(self.s3_client, self.output_bucket, self.analytics_key, analytics)
+    
+    def finish(self, analytics):
+        """Complete both uploads; returns the output locations and upload stats"""
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                raw_future = executor.submit(self.raw_writer.close)
+                analytics_future = executor.submit(self._put_analytics, analytics)
+                raw_bytes = raw_future.result()
+                analytics_bytes = analytics_future.result()
+        except Exception:
+            self.abort()
+            raise
+        
+        self.upload_seconds += time.perf_counter() - started
+        seconds = self.upload_seconds
+        upload_stats = {
+            'raw_data_bytes': raw_bytes,
+            'raw_data_uncompressed_bytes': self.raw_writer.uncompressed_bytes,
+            'analytics_bytes': analytics_bytes,
+            'seconds': round(seconds, 3),
+            'throughput_mb_per_sec': round((raw_bytes + analytics_bytes) / 1048576 / seconds, 2) if seconds else 0
+        }
+        logger.info(f"Results saved to S3: {self.output_bucket} {upload_stats}")
+        
+        return {
+            'raw_data': self.raw_writer.uri,
+            'analytics': f"s3://{self.output_bucket}/{self.analytics_key}"
+        }, upload_stats
 
-def generate_sales_data(count=100):
-    """Generate sample sales data using built-in random module"""
-    random.seed(42)  # For reproducible results
+def stream_sales_analytics(count, output_bucket, s3_client=None, seed=42, chunk_size=None, output_format='ndjson',
+                           sketches=False):
+    """
+    Generate, aggregate and upload sales records one chunk at a time
     
-    products = ['Widget A', 'Widget B', 'Widget C', 'Widget D', 'Widget E']
-    regions = ['North', 'South', 'East', 'West']
+    Each chunk is folded into a SalesAggregator and appended to the raw-data
+    object, then dropped. Without an S3 client (local test mode) only the
+    analytics are computed. Returns analytics, partials, output files and upload stats.
+    The analytics are built from the partials, exactly as in sharded mode.
+    """
+    aggregator = SalesAggregator(sketches=sketches)
     
-    data = []
-    for i in range(count):
-        quantity = random.randint(1, 20)
-        unit_price = round(random.uniform(10, 100), 2)
-        data.append({
-            'transaction_id': f"TXN-{i+1:04d}",
-            'product': random.choice(products),
-            'region': random.choice(regions),
-            'quantity': quantity,
-            'unit_price': unit_price,
-            'total_amount': round(quantity * unit_price, 2),
-            'date': (datetime.now(timezone.utc).replace(
-                day=random.randint(1, 28)
-            )).strftime('%Y-%m-%d')
-        })
+    if s3_client is None:
+        logger.info("Local test mode: Skipping S3 operations")
+        for chunk in generate_sales_chunks(count, chunk_size, seed):
+            aggregator.add(chunk)
+        logger.info(f"Generated {aggregator.count} records of type sales")
+        partials = aggregator.partials()
+        return sales_result_from_partials(partials), partials, local_output_files(output_bucket, 'sales', output_format), None
     
-    return data
+    uploader = ResultUploader(s3_client, output_bucket, 'sales', output_format)
+    try:
+        for chunk in generate_sales_chunks(count, chunk_size, seed):
+            aggregator.add(chunk)
+            uploader.write(chunk)
+    except Exception:
+        uploader.abort()
+        raise
+    logger.info(f"Generated {aggregator.count} records of type sales")
+    
+    partials = aggregator.partials()
+    analytics = sales_result_from_partials(partials)
+    s3_results, upload_stats = uploader.finish(analytics)
+    return analytics, partials, s3_results, upload_stats
 
-def generate_inventory_data():
-    """Generate sample inventory data"""
-    random.seed(42)
+def resolve_workers(value, count):
+    """Number of shard processes: 'auto' means one per vCPU, never more than there are seed blocks"""
+    if value in (None, '', 'auto'):
+        workers = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    else:
+        workers = int(value)
+    return max(1, min(workers or 1, math.ceil(count / SALES_SEED_BLOCK)))
+
+def stream_sales_analytics_sharded(count, output_bucket, workers, s3_client=None, seed=42, chunk_size=None,
+                                   output_format='ndjson', sketches=False, timings=None):
+    """
+    Spread sales generation and aggregation across worker processes
     
-    products = ['Widget A', 'Widget B', 'Widget C', 'Widget D', 'Widget E']
-    warehouses = ['WH-001', 'WH-002', 'WH-003']
+    Seed blocks are assigned to shards round-robin. Each worker aggregates its
+    shard (and uploads it as its own raw-data part) and sends back mergeable
+    partials, which are merged here. Results come back over one-way pipes:
+    Lambda has no /dev/shm, so multiprocessing.Queue and Pool cannot be used.
+    Returns the same values as stream_sales_analytics. If a timings dict is
+    passed, it is filled with the seconds spent starting the workers, in the
+    slowest shard and merging, so the process overhead can be measured.
+    """
+    import multiprocessing
     
-    data = []
-    for product in products:
-        for warehouse in warehouses:
-            current_stock = random.randint(0, 500)
-            reorder_level = random.randint(50, 100)
-            data.append({
-                'product': product,
-                'warehouse': warehouse,
-                'current_stock': current_stock,
-                'reorder_level': reorder_level,
-                'max_capacity': random.randint(800, 1200),
-                'needs_reorder': current_stock <= reorder_level,
-                'last_updated': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
-            })
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+    raw_key, analytics_key = output_keys('sales', datetime.now(timezone.utc), output_format)
+    context = multiprocessing.get_context('fork')
+    processes, connections = [], []
+    for shard in range(workers):
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_sales_shard_worker,
+            args=(sender, shard, workers, count, seed, chunk_size, sketches, output_format,
+                  output_bucket if s3_client else None, shard_key(raw_key, shard)),
+            daemon=True
+        )
+        process.start()
+        sender.close()
+        processes.append(process)
+        connections.append(receiver)
+    timings['start_seconds'] = time.perf_counter() - started
+    
+    results = []
+    try:
+        for shard, (process, receiver) in enumerate(zip(processes, connections)):
+            try:
+                status, payload = receiver.recv()
+            except EOFError:
+                process.join()
+                raise RuntimeError(f"Shard {shard} exited without a result (exit code {process.exitcode})")
+            if status == 'error':
+                raise RuntimeError(f"Shard {shard} failed: {payload}")
+            results.append(payload)
+    finally:
+        for process, receiver in zip(processes, connections):
+            receiver.close()
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+    
+    timings['slowest_shard_seconds'] = max(result['shard_seconds'] for result in results)
+    merge_started = time.perf_counter()
+    partials = reduce(merge_partials, (result['partials'] for result in results))
+    analytics = sales_result_from_partials(partials)
+    timings['merge_seconds'] = time.perf_counter() - merge_started
+    logger.info(f"Generated {partials['count']} records of type sales across {workers} worker processes")
+    
+    if s3_client is None:
+        logger.info("Local test mode: Skipping S3 operations")
+        return analytics, partials, local_output_files(output_bucket, 'sales', output_format), None
+    
+    started = time.perf_counter()
+    analytics_bytes = put_json(s3_client, output_bucket, analytics_key, analytics)
+    # Shards upload in parallel, so the raw data took as long as the slowest shard's writes
+    seconds = max(result['upload_seconds'] for result in results) + time.perf_counter() - started
+    raw_bytes = sum(result['raw_data_bytes'] for result in results)
+    upload_stats = {
+        'raw_data_bytes': raw_bytes,
+        'raw_data_uncompressed_bytes': sum(result['raw_data_uncompressed_bytes'] for result in results),
+        'analytics_bytes': analytics_bytes,
+        'seconds': round(seconds, 3),
+        'throughput_mb_per_sec': round((raw_bytes + analytics_bytes) / 1048576 / seconds, 2) if seconds else 0,
+        'workers': workers
+    }
+    logger.info(f"Results saved to S3: {output_bucket} {upload_stats}")
+    
+    return analytics, partials, {
+        'raw_data': f"s3://{output_bucket}/{raw_key.split('.', 1)[0]}-part-",
+        'raw_data_parts': [result['uri'] for result in results],
+        'analytics': f"s3://{output_bucket}/{analytics_key}"
+    }, upload_stats
+
+def shard_key(raw_key, shard):
+    """Raw-data key for one shard: raw-data-<timestamp>-part-00000.<ext>"""
+    stem, extension = raw_key.split('.', 1)
+    return f"{stem}-part-{shard:05d}.{extension}"
+
+def _sales_shard_worker(connection, shard, workers, count, seed, chunk_size, sketches, output_format,
+                        output_bucket, raw_key):
+    """Worker process entry point: aggregate one shard and send its partials to the parent"""
+    shard_started = time.perf_counter()
+    try:
+        aggregator = SalesAggregator(sketches=sketches)
+        blocks = range(shard, math.ceil(count / SALES_SEED_BLOCK), workers)
+        writer = None
+        if output_bucket:
+            # Clients and their connection pools are not fork-safe, so each worker makes its own
+            import boto3
+            writer = RAW_WRITERS[output_format](boto3.client('s3'), output_bucket, raw_key)
+        result = {}
+        upload_seconds = 0.0
+        try:
+            for chunk in generate_sales_chunks(count, chunk_size, seed, blocks):
+                aggregator.add(chunk)
+                if writer:
+                    started = time.perf_counter()
+                    writer.write(chunk)
+                    upload_seconds += time.perf_counter() - started
+            if writer:
+                started = time.perf_counter()
+                raw_data_bytes = writer.close()
+                result = {
+                    'uri': writer.uri,
+                    'raw_data_bytes': raw_data_bytes,
+                    'raw_data_uncompressed_bytes': writer.uncompressed_bytes,
+                    'upload_seconds': upload_seconds + time.perf_counter() - started
+                }
+        except Exception:
+            if writer:
+                writer.abort()
+            raise
+        result['partials'] = aggregator.partials()
+        result['shard_seconds'] = time.perf_counter() - shard_started
+        connection.send(('ok', result))
+    except Exception as e:
+        connection.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        connection.close()
+
+def get_state_store(backend, output_bucket, state_name):
+    """State store for the running sales totals"""
+    from analytics_state import DynamoDBStateStore, S3StateStore
+    if backend == 'dynamodb':
+        if not ANALYTICS_STATE_TABLE:
+            raise ValueError("ANALYTICS_STATE_TABLE must be set to use the dynamodb state backend")
+        return DynamoDBStateStore(get_aws_client('dynamodb'), ANALYTICS_STATE_TABLE, state_name)
+    return S3StateStore(get_aws_client('s3'), output_bucket, f"analytics/state/{state_name}.json")
+
+def fold_sales_state(store, batch_id, partials):
+    """Fold this batch into the running state and summarize the combined totals"""
+    state = store.fold(batch_id, partials)
+    combined = sales_result_from_partials(state)
+    logger.info(f"Folded batch {batch_id} into {store.uri}: {state['batches']} batches, {state['count']} records")
+    return {
+        'state': store.uri,
+        'batch_id': batch_id,
+        'batches_applied': state['batches'],
+        'total_records': combined['summary']['total_records'],
+        'key_metrics': combined['key_metrics'],
+        'by_product': combined['by_product'],
+        'by_region': combined['by_region'],
+        'approximate': combined.get('approximate')
+    }
+
+def save_to_s3(data, analytics, data_type, output_bucket, output_format='ndjson'):
+    """Save results to S3 (only in real AWS environment)"""
+    uploader = ResultUploader(get_aws_client('s3'), output_bucket, data_type, output_format)
+    try:
+        uploader.write(data)
+    except Exception:
+        uploader.abort()
+        raise
+    return uploader.finish(analytics)
+
+def generate_sales_chunks(count=100, chunk_size=None, seed=42, blocks=None):
+    """
+    Sample sales data as SalesBatch chunks of at most chunk_size records
+    
+    Records are generated in blocks of SALES_SEED_BLOCK, each from its own
+    private generator seeded by (seed, block). The same seed always yields the
+    same records, and a subset of blocks (one shard) can be generated without
+    the others. The global random state is never touched. Batches are columnar
+    and iterate as record dicts.
+    """
+    chunk_size = chunk_size or SALES_CHUNK_SIZE
+    if blocks is None:
+        blocks = range(math.ceil(count / SALES_SEED_BLOCK))
     
+    now = datetime.now(timezone.utc)
+    # Only the day varies between records, so format each possible date once
+    dates = [None] + [now.replace(day=day).strftime('%Y-%m-%d') for day in range(1, 29)]
+    
+    return sales_batches(count, chunk_size, seed, blocks, SALES_SEED_BLOCK, SALES_CUSTOMER_POOL, dates)
+
+def generate_sales_data(count=100, seed=42):
+    """Generate sample sales data with a private, seeded generator"""
+    data = []
+    for chunk in generate_sales_chunks(count, seed=seed):
+        data.extend(chunk)
     return data
 
-def test_external_api():
-    """Test external API integration"""
+def generate_inventory_data(seed=42):
+    """Generate sample inventory data with a private, seeded generator"""
+    return inventory_records(seed, datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+
+def get_http_session():
+    """
+    Shared requests session with a connection pool and retry policy
+    
+    Created once per container, so warm invocations reuse kept-alive
+    connections instead of paying for a new TCP and TLS handshake each time.
+    """
+    global _http_session
+    if _http_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        retry = Retry(
+            total=HTTP_RETRIES,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _http_session = session
+    return _http_session
+
+def probe_endpoint(url):
+    """Call one endpoint and describe the outcome as an api_test record"""
+    start = time.perf_counter()
     try:
-        response = requests.get('https://httpbin.org/json', timeout=10)
+        response = get_http_session().get(url, timeout=HTTP_TIMEOUT)
         response.raise_for_status()
         api_data = response.json()
         
-        return [{
+        return {
             'api_test': True,
+            'endpoint': url,
             'status': 'success',
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
             'response_data': api_data,
             'timestamp': datetime.now(timezone.utc).isoformat()
-        }]
+        }
     except Exception as e:
-        return [{
+        return {
             'api_test': True,
+            'endpoint': url,
             'status': 'failed',
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
             'error': str(e),
             'timestamp': datetime.now(timezone.utc).isoformat()
-        }]
+        }
+
+def test_external_api(endpoints=None):
+    """Test external API integration, probing all endpoints concurrently"""
+    endpoints = endpoints or API_TEST_ENDPOINTS
+    if len(endpoints) == 1:
+        return [probe_endpoint(endpoints[0])]
+    
+    with ThreadPoolExecutor(max_workers=min(len(endpoints), HTTP_POOL_SIZE)) as executor:
+        return list(executor.map(probe_endpoint, endpoints))
 
 def perform_analytics(data, data_type):
-    """Perform analytics using built-in Python functions"""
+    """Perform analytics on the generated records"""
     
     if data_type == 'sales':
-        # Calculate totals and averages
-        total_revenue = sum(item['total_amount'] for item in data)
-        total_quantity = sum(item['quantity'] for item in data)
-        avg_order_value = total_revenue / len(data) if data else 0
-        
-        # Group by product
-        product_stats = {}
-        for item in data:
-            product = item['product']
-            if product not in product_stats:
-                product_stats[product] = {'revenue': 0, 'quantity': 0, 'orders': 0}
-            product_stats[product]['revenue'] += item['total_amount']
-            product_stats[product]['quantity'] += item['quantity']
-            product_stats[product]['orders'] += 1
-        
-        # Group by region
-        region_stats = {}
-        for item in data:
-            region = item['region']
-            if region not in region_stats:
-                region_stats[region] = {'revenue': 0, 'quantity': 0, 'orders': 0}
-            region_stats[region]['revenue'] += item['total_amount']
-            region_stats[region]['quantity'] += item['quantity']
-            region_stats[region]['orders'] += 1
-        
-        return {
-            'summary': {
-                'total_records': len(data),
-                'data_type': data_type
-            },
-            'key_metrics': {
-                'total_revenue': round(total_revenue, 2),
-                'average_order_value': round(avg_order_value, 2),
-                'total_quantity_sold': total_quantity
-            },
-            'by_product': product_stats,
-            'by_region': region_stats
-        }
+        # Totals and group-bys are computed in one vectorized pass over column arrays
+        return sales_analytics(data)
     
     elif data_type == 'inventory':
         total_stock = sum(item['current_stock'] for item in data)
@@ -287,7 +633,8 @@ def perform_analytics(data, data_type):
             'key_metrics': {
                 'successful_api_calls': successful_calls,
                 'failed_api_calls': failed_calls,
-                'success_rate': round((successful_calls / len(data) * 100) if data else 0, 1)
+                'success_rate': round((successful_calls / len(data) * 100) if data else 0, 1),
+                'slowest_call_ms': max((item.get('elapsed_ms', 0) for item in data), default=0)
             },
             'test_results': data
         }
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the sales analytics engine against the original four-pass loops.
+Runs locally without AWS access: python benchmark_analytics.py --records 1000000
+"""
+
+import argparse
+import time
+
+import analytics_engine
+import app
+
+def make_records(count):
+    """Build sales records as record dicts, exactly as app.generate_sales_data returns them"""
+    return app.generate_sales_data(count, seed=42)
+
+def four_pass_analytics(data):
+    """The original implementation: one Python loop per metric"""
+    total_revenue = sum(item['total_amount'] for item in data)
+    total_quantity = sum(item['quantity'] for item in data)
+    product_stats = {}
+    for item in data:
+        stats = product_stats.setdefault(item['product'], {'revenue': 0, 'quantity': 0, 'orders': 0})
+        stats['revenue'] += item['total_amount']
+        stats['quantity'] += item['quantity']
+        stats['orders'] += 1
+    region_stats = {}
+    for item in data:
+        stats = region_stats.setdefault(item['region'], {'revenue': 0, 'quantity': 0, 'orders': 0})
+        stats['revenue'] += item['total_amount']
+        stats['quantity'] += item['quantity']
+        stats['orders'] += 1
+    return total_revenue, total_quantity, product_stats, region_stats
+
+def single_pass_python(records):
+    """The engine's pure Python fallback"""
+    return analytics_engine._build_sales_result(*analytics_engine.sales_partials_python(records))
+
+def aggregate_with_sketches(records):
+    """The handler's path with sketches on: totals plus distinct customers and percentiles"""
+    aggregator = analytics_engine.SalesAggregator(sketches=True)
+    aggregator.add(records)
+    return aggregator.result()
+
+def best_of(func, arg, repeat):
+    """Fastest of several runs, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sales analytics implementations')
+    parser.add_argument('--records', '-n', type=int, default=1000000,
+                        help='Number of sales records (default: 1000000)')
+    parser.add_argument('--repeat', '-r', type=int, default=3,
+                        help='Runs per implementation, best time is reported (default: 3)')
+    args = parser.parse_args()
+
+    print(f"Generating {args.records:,} records...")
+    records = make_records(args.records)
+
+    print(f"\n{'Implementation':<32}{'Time (ms)':>12}{'Speedup':>10}")
+    print('-' * 54)
+    baseline_ms, baseline = best_of(four_pass_analytics, records, args.repeat)
+    print(f"{'four-pass Python loops':<32}{baseline_ms:>12.1f}{'1.0x':>10}")
+
+    python_ms, python_result = best_of(single_pass_python, records, args.repeat)
+    print(f"{'single-pass Python':<32}{python_ms:>12.1f}{baseline_ms / python_ms:>9.1f}x")
+
+    if analytics_engine.np is not None:
+        load_ms, columns = best_of(analytics_engine.load_sales_columns, records, args.repeat)
+        print(f"{'NumPy: load columns':<32}{load_ms:>12.1f}")
+        aggregate_ms, _ = best_of(analytics_engine.column_partials, columns, args.repeat)
+        print(f"{'NumPy: aggregate only':<32}{aggregate_ms:>12.1f}{baseline_ms / aggregate_ms:>9.1f}x")
+        engine_ms, engine_result = best_of(analytics_engine.sales_analytics, records, args.repeat)
+        print(f"{'NumPy: load + aggregate':<32}{engine_ms:>12.1f}{baseline_ms / engine_ms:>9.1f}x")
+        sketch_ms, _ = best_of(aggregate_with_sketches, records, args.repeat)
+        # Sketches add work the baseline never did, so no speedup is shown
+        print(f"{'NumPy: with sketches':<32}{sketch_ms:>12.1f}")
+
+        # The outputs must agree to the cent
+        assert engine_result['key_metrics']['total_revenue'] == round(baseline[0], 2)
+        assert engine_result['key_metrics']['total_quantity_sold'] == baseline[1]
+        assert list(engine_result['by_product']) == list(baseline[2])
+    else:
+        print("NumPy is not installed; skipping the vectorized engine")
+
+    assert python_result['key_metrics']['total_quantity_sold'] == baseline[1]
+    print("\nResults match the original implementation")
+
+if __name__ == "__main__":
+    main()
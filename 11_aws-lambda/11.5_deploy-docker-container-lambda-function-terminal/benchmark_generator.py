@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized sales data generator against the per-field random loop.
+Runs locally without AWS access: python benchmark_generator.py --records 10000000
+"""
+
+import argparse
+import math
+import random
+import time
+
+import analytics_engine
+import app
+import data_generator
+
+def per_field_loop(count, seed=42):
+    """The original generator: one random call per field, in a Python loop"""
+    dates = [None] + [f"2024-01-{day:02d}" for day in range(1, 29)]
+    records = []
+    for block in range(math.ceil(count / app.SALES_SEED_BLOCK)):
+        rng = random.Random(f"{seed}:{block}")
+        start = block * app.SALES_SEED_BLOCK
+        for i in range(start, min(start + app.SALES_SEED_BLOCK, count)):
+            quantity = rng.randint(1, 20)
+            unit_price = round(rng.uniform(10, 100), 2)
+            records.append({
+                'transaction_id': f"TXN-{i+1:04d}",
+                'product': rng.choice(data_generator.PRODUCTS),
+                'region': rng.choice(data_generator.REGIONS),
+                'quantity': quantity,
+                'unit_price': unit_price,
+                'total_amount': round(quantity * unit_price, 2),
+                'date': dates[rng.randint(1, 28)],
+                'customer_id': f"CUST-{rng.randint(1, app.SALES_CUSTOMER_POOL):07d}"
+            })
+    return len(records)
+
+def columns_only(count, seed=42):
+    """Vectorized SalesBatch chunks, without building record dicts"""
+    return sum(len(chunk) for chunk in app.generate_sales_chunks(count, seed=seed))
+
+def columns_with_analytics(count, seed=42):
+    """Batches aggregated straight from their columns, as in local test mode"""
+    aggregator = analytics_engine.SalesAggregator()
+    for chunk in app.generate_sales_chunks(count, seed=seed):
+        aggregator.add(chunk)
+    return aggregator.count
+
+def columns_to_arrow(count, seed=42):
+    """Batches converted to Arrow tables, as the Parquet writer does"""
+    return sum(chunk.arrow_table().num_rows for chunk in app.generate_sales_chunks(count, seed=seed))
+
+def record_dicts(count, seed=42):
+    """Batches turned into record dicts, as the NDJSON writer iterates them"""
+    return sum(len(chunk.records()) for chunk in app.generate_sales_chunks(count, seed=seed))
+
+def timed(func, count):
+    start = time.perf_counter()
+    rows = func(count)
+    assert rows == count
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sales data generators')
+    parser.add_argument('--records', '-n', type=int, default=1000000,
+                        help='Number of sales records (default: 1000000)')
+    parser.add_argument('--skip-baseline', action='store_true',
+                        help='Skip the slow per-field loop (useful for 10M+ records)')
+    args = parser.parse_args()
+
+    if data_generator.np is None:
+        print("NumPy is not installed; the generator uses its pure Python fallback")
+
+    print(f"{args.records:,} records")
+    print(f"\n{'Generator':<32}{'Time (s)':>12}{'Records/s':>14}{'Speedup':>10}")
+    print('-' * 68)
+    baseline = None
+    if not args.skip_baseline:
+        baseline = timed(per_field_loop, args.records)
+        print(f"{'per-field random loop':<32}{baseline:>12.2f}{args.records / baseline:>14,.0f}{'1.0x':>10}")
+    candidates = [
+        ('vectorized columns', columns_only),
+        ('columns + analytics', columns_with_analytics),
+        ('columns -> record dicts', record_dicts)
+    ]
+    try:
+        import pyarrow  # noqa: F401
+        candidates.append(('columns -> Arrow tables', columns_to_arrow))
+    except ImportError:
+        pass
+    for name, func in candidates:
+        seconds = timed(func, args.records)
+        speedup = f"{baseline / seconds:.1f}x" if baseline else '-'
+        print(f"{name:<32}{seconds:>12.2f}{args.records / seconds:>14,.0f}{speedup:>10}")
+
+    # Same seed, same records; the schema matches the original generator
+    first = app.generate_sales_data(1000, seed=7)
+    assert first == app.generate_sales_data(1000, seed=7)
+    state = random.getstate()
+    app.generate_inventory_data()
+    assert random.getstate() == state, "the global random state must not change"
+    print("\nOutput is reproducible and the global random state is untouched")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark the pooled HTTP session used by the api_test data type.
+Starts a local stub HTTP server, so no internet access is needed:
+python benchmark_http.py --requests 200 --endpoints 8 --latency 50
+"""
+
+import argparse
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import app
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every GET with a small JSON document over a kept-alive connection"""
+
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    connections = 0
+    flaky_failures = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        # Headers and body are separate writes; without this, delayed ACKs stall kept-alive requests
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def do_GET(self):
+        if self.path.startswith('/flaky'):
+            with StubHandler.lock:
+                fail = StubHandler.flaky_failures > 0
+                StubHandler.flaky_failures -= 1
+            if fail:
+                self.send_json(503, {'error': 'try again'})
+                return
+        time.sleep(self.latency)
+        self.send_json(200, {'slideshow': {'title': 'stub', 'path': self.path}})
+
+    def send_json(self, status, document):
+        body = json.dumps(document).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def timed(func, *args):
+    """Run once and return (milliseconds, new connections, result)"""
+    connections = StubHandler.connections
+    start = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - start) * 1000, StubHandler.connections - connections, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pooled HTTP calls against a local stub server')
+    parser.add_argument('--requests', '-n', type=int, default=200,
+                        help='Sequential requests per client (default: 200)')
+    parser.add_argument('--endpoints', '-e', type=int, default=8,
+                        help='Endpoints to probe in the concurrency test (default: 8)')
+    parser.add_argument('--latency', '-l', type=float, default=50,
+                        help='Simulated server latency in ms for the concurrency test (default: 50)')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"Stub server at {base_url}")
+    print(f"\n{'Client':<36}{'Time (ms)':>12}{'Connections':>14}")
+    print('-' * 62)
+
+    def unpooled(count):
+        for _ in range(count):
+            requests.get(f"{base_url}/json", timeout=app.HTTP_TIMEOUT).json()
+
+    def pooled(count):
+        session = app.get_http_session()
+        for _ in range(count):
+            session.get(f"{base_url}/json", timeout=app.HTTP_TIMEOUT).json()
+
+    ms, connections, _ = timed(unpooled, args.requests)
+    print(f"{'requests.get per call':<36}{ms:>12.1f}{connections:>14}")
+    ms, connections, _ = timed(pooled, args.requests)
+    print(f"{'pooled session':<36}{ms:>12.1f}{connections:>14}")
+
+    StubHandler.latency = args.latency / 1000
+    endpoints = [f"{base_url}/json?id={i}" for i in range(args.endpoints)]
+    ms, _, sequential = timed(lambda urls: [app.probe_endpoint(url) for url in urls], endpoints)
+    print(f"{f'{args.endpoints} endpoints, one at a time':<36}{ms:>12.1f}")
+    ms, _, concurrent = timed(app.test_external_api, endpoints)
+    print(f"{f'{args.endpoints} endpoints, concurrent':<36}{ms:>12.1f}")
+    assert all(item['status'] == 'success' for item in sequential + concurrent)
+
+    # Two 503s in a row are absorbed by the retry policy
+    StubHandler.latency = 0
+    StubHandler.flaky_failures = 2
+    result = app.probe_endpoint(f"{base_url}/flaky")
+    print(f"\nFlaky endpoint after retries: {result['status']} in {result['elapsed_ms']} ms")
+    assert result['status'] == 'success'
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark sharded sales analytics across worker processes.
+Runs locally without AWS access (S3 uploads are skipped):
+python benchmark_sharded.py --records 2000000 --workers 1 2 4 6
+
+Lambda allocates vCPUs in proportion to memory, so run this on a machine (or a
+function configuration) with at least as many cores as the largest worker count.
+For sharded runs, the start, slowest-shard and merge times are shown separately:
+the time not spent in the slowest shard is process overhead.
+"""
+
+import argparse
+import logging
+import os
+import time
+
+import app
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sharded sales analytics')
+    parser.add_argument('--records', '-n', type=int, default=2000000,
+                        help='Number of sales records (default: 2000000)')
+    parser.add_argument('--workers', '-w', type=int, nargs='+',
+                        help='Worker counts to compare (default: 1 up to the number of vCPUs)')
+    parser.add_argument('--sketches', action='store_true',
+                        help='Also compute distinct-customer and percentile sketches')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    worker_counts = args.workers or list(range(1, cpus + 1))
+    print(f"{args.records:,} records, {cpus} vCPUs available")
+
+    print(f"\n{'Workers':<10}{'Time (s)':>12}{'Records/s':>14}{'Speedup':>10}"
+          f"{'Start (s)':>12}{'Slowest (s)':>13}{'Merge (s)':>12}")
+    print('-' * 83)
+    baseline_seconds = None
+    baseline_metrics = None
+    for workers in worker_counts:
+        timings = {}
+        start = time.perf_counter()
+        if workers == 1:
+            analytics = app.stream_sales_analytics(args.records, 'benchmark', sketches=args.sketches)[0]
+        else:
+            analytics = app.stream_sales_analytics_sharded(args.records, 'benchmark', workers,
+                                                           sketches=args.sketches, timings=timings)[0]
+        seconds = time.perf_counter() - start
+        if baseline_seconds is None:
+            baseline_seconds = seconds
+            baseline_metrics = analytics['key_metrics']
+        # Every worker count must produce the same totals
+        assert analytics['key_metrics'] == baseline_metrics
+        # Start and merge are process overhead; the slowest shard bounds the useful parallel work
+        phases = ''.join(f"{timings[phase]:>{width}.2f}" if phase in timings else f"{'-':>{width}}"
+                         for phase, width in (('start_seconds', 12), ('slowest_shard_seconds', 13),
+                                              ('merge_seconds', 12)))
+        print(f"{workers:<10}{seconds:>12.2f}{args.records / seconds:>14,.0f}{baseline_seconds / seconds:>9.1f}x"
+              f"{phases}")
+
+    print("\nResults match across all worker counts")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Measure the import-time cold-start cost of the Lambda handler module.
+Each run imports the handler in a fresh interpreter with -X importtime, reports
+the most expensive modules, and exits non-zero when the median init time goes
+over the budget, so it can gate a Docker build:
+python cold_start_budget.py --budget-ms 300 --forbid boto3 requests pyarrow
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Imports the handler and prints how long it took, in milliseconds. __import__ is used
+# rather than importlib.import_module, which -X importtime does not report
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); "
+    "__import__({module!r}); "
+    "print((time.perf_counter() - start) * 1000); "
+    "import sys; print(','.join(sorted(sys.modules)))"
+)
+
+def run_import(module, path):
+    """Import the module in a new interpreter; returns (init ms, loaded modules, importtime rows)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', IMPORT_SNIPPET.format(module=module)],
+        cwd=path, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"Importing {module} failed")
+    init_ms, loaded = result.stdout.strip().splitlines()[-2:]
+    return float(init_ms), set(loaded.split(',')), parse_importtime(result.stderr)
+
+def parse_importtime(output):
+    """Rows of (self us, cumulative us, depth, module) from -X importtime output"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+def handler_subtree(rows, module):
+    """The handler's row and every import nested under it; -X importtime lists children before their parent"""
+    index = max((i for i, row in enumerate(rows) if row[3] == module), default=None)
+    if index is None:
+        return []
+    depth = rows[index][2]
+    start = index
+    while start > 0 and rows[start - 1][2] > depth:
+        start -= 1
+    return rows[start:index + 1]
+
+def package_costs(rows):
+    """Self time summed per top-level package"""
+    costs = {}
+    for self_us, _, _, name in rows:
+        package = name.split('.')[0]
+        costs[package] = costs.get(package, 0) + self_us
+    return sorted(costs.items(), key=lambda item: item[1], reverse=True)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure handler import time and enforce a cold-start budget',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python cold_start_budget.py
+  python cold_start_budget.py --budget-ms 300 --runs 7
+  python cold_start_budget.py --forbid boto3 requests pyarrow
+        """
+    )
+    parser.add_argument('--module', '-m', default='app',
+                        help='Handler module to import (default: app)')
+    parser.add_argument('--path', '-p', default=os.getcwd(),
+                        help='Directory containing the handler (default: current directory)')
+    parser.add_argument('--budget-ms', '-b', type=float,
+                        default=float(os.environ.get('COLD_START_BUDGET_MS', '300')),
+                        help='Maximum median import time in ms (default: $COLD_START_BUDGET_MS or 300)')
+    parser.add_argument('--runs', '-r', type=int, default=5,
+                        help='Fresh interpreters to measure; the median is compared (default: 5)')
+    parser.add_argument('--top', '-t', type=int, default=15,
+                        help='Number of packages to list (default: 15)')
+    parser.add_argument('--forbid', '-f', nargs='*', default=[],
+                        help='Modules that must not be imported at init time')
+    args = parser.parse_args()
+
+    # The first import may compile bytecode; it is reported but not part of the median
+    first_ms, _, _ = run_import(args.module, args.path)
+    runs = [run_import(args.module, args.path) for _ in range(args.runs)]
+    timings = [init_ms for init_ms, _, _ in runs]
+    median_ms = statistics.median(timings)
+    _, loaded, rows = runs[timings.index(sorted(timings)[len(timings) // 2])]
+    # Interpreter start-up imports (site, encodings) are not part of the handler's cost
+    rows = handler_subtree(rows, args.module)
+
+    print(f"Import of '{args.module}': first run {first_ms:.1f} ms, "
+          f"median {median_ms:.1f} ms over {args.runs} runs (min {min(timings):.1f}, max {max(timings):.1f})")
+
+    print(f"\n{'Package':<32}{'Self time (ms)':>16}")
+    print('-' * 48)
+    for package, self_us in package_costs(rows)[:args.top]:
+        print(f"{package:<32}{self_us / 1000:>16.1f}")
+
+    print(f"\n{'Direct import of ' + args.module:<32}{'Cumulative (ms)':>16}")
+    print('-' * 48)
+    handler_depth = rows[-1][2] if rows else 0
+    direct = [(cumulative, name) for _, cumulative, depth, name in rows if depth == handler_depth + 1]
+    for cumulative, name in sorted(direct, reverse=True)[:args.top]:
+        print(f"{name:<32}{cumulative / 1000:>16.1f}")
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    for module in args.forbid:
+        if module in loaded:
+            failures.append(f"'{module}' is imported at init time; defer it to the code path that needs it")
+
+    if failures:
+        print("\nCold-start budget FAILED:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print(f"\nCold-start budget OK ({median_ms:.1f} ms <= {args.budget_ms:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
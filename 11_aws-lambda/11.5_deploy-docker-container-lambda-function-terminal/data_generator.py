@@ -0,0 +1,264 @@
+"""
+Vectorized sample data generator for the container Lambda function.
+Each field is drawn as a whole column from a private NumPy Generator, instead
+of one random.randint/uniform/choice call per field, so millions of rows take
+seconds. Generators are seeded per (seed, block) and the global random state is
+never touched. A pure Python fallback with the same schema is used when NumPy
+is missing.
+
+Sales chunks stay columnar (SalesBatch): the analytics engine and the Parquet
+writer read the columns directly, and record dicts are only built when a
+consumer iterates the batch.
+"""
+
+import hashlib
+import random
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure Python path gives the same schema
+    np = None
+
+PRODUCTS = ['Widget A', 'Widget B', 'Widget C', 'Widget D', 'Widget E']
+REGIONS = ['North', 'South', 'East', 'West']
+WAREHOUSES = ['WH-001', 'WH-002', 'WH-003']
+
+def block_rng(seed, block):
+    """
+    Private generator for one (seed, block) pair
+
+    The pair is hashed into a 128-bit seed, so any seed value (int or string)
+    works and neighbouring blocks get unrelated streams.
+    """
+    key = f"{seed}:{block}"
+    if np is None:
+        return random.Random(key)
+    entropy = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest(), 'big')
+    return np.random.Generator(np.random.PCG64(entropy))
+
+def sales_columns(start, stop, seed, block, customer_pool):
+    """
+    Column arrays for sales records start..stop-1 of one seed block
+
+    Prices are drawn in whole cents, so total_amount is exact to the cent.
+    Products, regions and days are integer codes; sales_records turns them into
+    the record fields.
+    """
+    size = stop - start
+    rng = block_rng(seed, block)
+    if np is None:
+        randint = rng.randint
+        return {
+            'index': list(range(start, stop)),
+            'product': [randint(0, len(PRODUCTS) - 1) for _ in range(size)],
+            'region': [randint(0, len(REGIONS) - 1) for _ in range(size)],
+            'quantity': [randint(1, 20) for _ in range(size)],
+            'price_cents': [randint(1000, 10000) for _ in range(size)],
+            'day': [randint(1, 28) for _ in range(size)],
+            'customer': [randint(1, customer_pool) for _ in range(size)]
+        }
+
+    return {
+        'index': np.arange(start, stop, dtype=np.int64),
+        'product': rng.integers(0, len(PRODUCTS), size, dtype=np.int8),
+        'region': rng.integers(0, len(REGIONS), size, dtype=np.int8),
+        'quantity': rng.integers(1, 20, size, endpoint=True, dtype=np.int64),
+        'price_cents': rng.integers(1000, 10000, size, endpoint=True, dtype=np.int64),
+        'day': rng.integers(1, 28, size, endpoint=True, dtype=np.int8),
+        'customer': rng.integers(1, customer_pool, size, endpoint=True, dtype=np.int64)
+    }
+
+def concat_columns(parts):
+    """Join column sets end to end"""
+    if len(parts) == 1:
+        return parts[0]
+    if np is None:
+        return {name: [value for part in parts for value in part[name]] for name in parts[0]}
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+def slice_columns(columns, start, stop):
+    return {name: values[start:stop] for name, values in columns.items()}
+
+class SalesBatch:
+    """
+    A chunk of sales records held as columns
+
+    Behaves like a list of record dicts for code that iterates it (the NDJSON
+    writer); the dicts are built on first use and cached. Columnar consumers
+    use coded_columns, sketch_values or arrow_table instead and skip the dicts.
+    """
+
+    def __init__(self, columns, dates):
+        self.columns = columns
+        self.dates = dates
+        self._records = None
+
+    def __len__(self):
+        return len(self.columns['quantity'])
+
+    def __iter__(self):
+        return iter(self.records())
+
+    def records(self):
+        if self._records is None:
+            self._records = sales_records(self.columns, self.dates)
+        return self._records
+
+    def coded_columns(self):
+        """
+        Columns in the analytics engine's layout (see load_sales_columns)
+
+        Codes are renumbered in order of first appearance, the order the engine
+        uses for record dicts, so both paths give identical group-by output.
+        """
+        columns = self.columns
+        result = {
+            'quantity': columns['quantity'],
+            'total_amount': columns['quantity'] * columns['price_cents'] / 100
+        }
+        for field, labels in (('product', PRODUCTS), ('region', REGIONS)):
+            codes = columns[field]
+            present, first = np.unique(codes, return_index=True)
+            order = present[np.argsort(first)]
+            renumber = np.zeros(len(labels), dtype=np.intp)
+            renumber[order] = np.arange(len(order))
+            result[f"{field}_codes"] = renumber[codes]
+            result[f"{field}s"] = [labels[code] for code in order]
+        return result
+
+    def sketch_values(self):
+        """
+        Distinct customer_id values and every total_amount, for the sketches
+
+        Only distinct customer numbers are formatted as ids, and amounts come
+        from the columns, so no record dicts are built.
+        """
+        columns = self.columns
+        if np is None:
+            customers = [f"CUST-{customer:07d}" for customer in set(columns['customer'])]
+            amounts = [q * p / 100 for q, p in zip(columns['quantity'], columns['price_cents'])]
+            return customers, amounts
+        customers = [f"CUST-{customer:07d}" for customer in np.unique(columns['customer']).tolist()]
+        return customers, (columns['quantity'] * columns['price_cents'] / 100).tolist()
+
+    def arrow_table(self, schema=None):
+        """pyarrow Table with the same columns and types as Table.from_pylist(records)"""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        if np is None:
+            return pa.Table.from_pylist(self.records(), schema=schema)
+
+        def labelled(codes, labels):
+            return pa.DictionaryArray.from_arrays(pa.array(codes), pa.array(labels)).cast(pa.string())
+
+        def padded(prefix, numbers, width):
+            digits = pc.utf8_lpad(pc.cast(pa.array(numbers), pa.string()), width, '0')
+            return pc.binary_join_element_wise(prefix, digits, '')
+
+        columns = self.columns
+        data = {
+            'transaction_id': padded('TXN-', columns['index'] + 1, 4),
+            'product': labelled(columns['product'], PRODUCTS),
+            'region': labelled(columns['region'], REGIONS),
+            'quantity': pa.array(columns['quantity']),
+            'unit_price': pa.array(columns['price_cents'] / 100),
+            'total_amount': pa.array(columns['quantity'] * columns['price_cents'] / 100),
+            'date': labelled(columns['day'], self.dates),
+            'customer_id': padded('CUST-', columns['customer'], 7)
+        }
+        return pa.Table.from_pydict(data, schema=schema)
+
+def sales_batches(count, chunk_size, seed, blocks, block_size, customer_pool, dates):
+    """
+    Yield SalesBatch chunks of chunk_size records (the last may be shorter)
+
+    Each block of block_size records comes from its own (seed, block) generator,
+    so the records do not depend on chunk_size or on which other blocks are generated.
+    """
+    pending = []
+    pending_rows = 0
+    for block in blocks:
+        start = block * block_size
+        columns = sales_columns(start, min(start + block_size, count), seed, block, customer_pool)
+        pending.append(columns)
+        pending_rows += len(columns['quantity'])
+        if pending_rows < chunk_size:
+            continue
+        joined = concat_columns(pending)
+        offset = 0
+        while pending_rows - offset >= chunk_size:
+            yield SalesBatch(slice_columns(joined, offset, offset + chunk_size), dates)
+            offset += chunk_size
+        pending = [slice_columns(joined, offset, pending_rows)] if offset < pending_rows else []
+        pending_rows -= offset
+    if pending_rows:
+        yield SalesBatch(concat_columns(pending), dates)
+
+def sales_records(columns, dates):
+    """
+    Sales record dicts for a set of columns
+
+    dates maps a day of the month (1-28) to its formatted date. Every column is
+    converted to Python objects in one call before the rows are zipped together.
+    """
+    if np is None:
+        products = [PRODUCTS[code] for code in columns['product']]
+        regions = [REGIONS[code] for code in columns['region']]
+        day_names = [dates[day] for day in columns['day']]
+        quantities = list(columns['quantity'])
+        price_cents = list(columns['price_cents'])
+        total_cents = [q * p for q, p in zip(quantities, price_cents)]
+        indexes, customers = columns['index'], columns['customer']
+    else:
+        # Indexing an object array returns the shared label strings, not copies
+        products = np.array(PRODUCTS, dtype=object)[columns['product']].tolist()
+        regions = np.array(REGIONS, dtype=object)[columns['region']].tolist()
+        day_names = np.array(dates, dtype=object)[columns['day']].tolist()
+        quantities = columns['quantity'].tolist()
+        price_cents = columns['price_cents'].tolist()
+        total_cents = (columns['quantity'] * columns['price_cents']).tolist()
+        indexes, customers = columns['index'].tolist(), columns['customer'].tolist()
+
+    return [
+        {
+            'transaction_id': f"TXN-{i+1:04d}",
+            'product': product,
+            'region': region,
+            'quantity': quantity,
+            'unit_price': cents / 100,
+            'total_amount': total / 100,
+            'date': date,
+            'customer_id': f"CUST-{customer:07d}"
+        }
+        for i, product, region, quantity, cents, total, date, customer
+        in zip(indexes, products, regions, quantities, price_cents, total_cents, day_names, customers)
+    ]
+
+def inventory_records(seed, last_updated):
+    """Inventory rows for every product and warehouse, drawn from a private generator"""
+    size = len(PRODUCTS) * len(WAREHOUSES)
+    rng = block_rng(seed, 'inventory')
+    if np is None:
+        current_stock = [rng.randint(0, 500) for _ in range(size)]
+        reorder_level = [rng.randint(50, 100) for _ in range(size)]
+        max_capacity = [rng.randint(800, 1200) for _ in range(size)]
+    else:
+        current_stock = rng.integers(0, 500, size, endpoint=True).tolist()
+        reorder_level = rng.integers(50, 100, size, endpoint=True).tolist()
+        max_capacity = rng.integers(800, 1200, size, endpoint=True).tolist()
+
+    pairs = [(product, warehouse) for product in PRODUCTS for warehouse in WAREHOUSES]
+    return [
+        {
+            'product': product,
+            'warehouse': warehouse,
+            'current_stock': stock,
+            'reorder_level': reorder,
+            'max_capacity': capacity,
+            'needs_reorder': stock <= reorder,
+            'last_updated': last_updated
+        }
+        for (product, warehouse), stock, reorder, capacity
+        in zip(pairs, current_stock, reorder_level, max_capacity)
+    ]
@@ -0,0 +1,215 @@
+"""
+Streaming S3 writers for the container Lambda function.
+Records are written chunk by chunk through a multipart upload, so the full
+output never has to exist in memory as one string. Parts are uploaded in
+background threads while the caller keeps producing data. Output is gzip
+NDJSON or Snappy-compressed Parquet.
+"""
+
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# S3 requires every part except the last to be at least 5 MB
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+# Parts in flight at once; bounds buffered memory to about this many parts
+DEFAULT_MAX_CONCURRENCY = 4
+def default_row_group_mb():
+    """
+    Row group size that fits the function's memory
+
+    Pending Arrow tables are held until a row group is full, and concatenating
+    them briefly doubles that, so a row group gets 1/16 of the configured memory
+    (32 MB at 512 MB), between 16 and 128 MB.
+    """
+    memory_mb = int(os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE', '512'))
+    return max(16, min(128, memory_mb // 16))
+
+# Athena splits scans by row group; large groups mean fewer, more efficient reads
+PARQUET_ROW_GROUP_BYTES = int(os.environ.get('PARQUET_ROW_GROUP_MB', default_row_group_mb())) * 1024 * 1024
+
+class MultipartUploadStream:
+    """
+    Buffer bytes and upload them to S3 in fixed-size multipart parts
+
+    The multipart upload is only started once the first part is full; smaller
+    outputs are sent with a single put_object call on close.
+    """
+
+    def __init__(self, s3_client, bucket, key, content_type='application/octet-stream',
+                 part_size=DEFAULT_PART_SIZE, extra_args=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = part_size
+        self.extra_args = extra_args or {}
+        self.max_concurrency = max_concurrency
+        self.buffer = bytearray()
+        self.upload_id = None
+        self.executor = None
+        self.pending = []
+        self.parts = []
+        self.bytes_written = 0
+        self.closed = False
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.part_size:
+            part = bytes(self.buffer[:self.part_size])
+            del self.buffer[:self.part_size]
+            self._submit_part(part)
+        return len(data)
+
+    def tell(self):
+        return self.bytes_written + len(self.buffer)
+
+    def flush(self):
+        pass
+
+    def _submit_part(self, body):
+        if self.upload_id is None:
+            self.upload_id = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type, **self.extra_args
+            )['UploadId']
+            self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        # Wait for the oldest part before queueing more, so memory stays bounded
+        if len(self.pending) >= self.max_concurrency:
+            self.parts.append(self.pending.pop(0).result())
+        part_number = len(self.parts) + len(self.pending) + 1
+        self.pending.append(self.executor.submit(self._upload_part, part_number, body))
+        self.bytes_written += len(body)
+
+    def _upload_part(self, part_number, body):
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            PartNumber=part_number, Body=body
+        )
+        return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+    def close(self):
+        """Flush remaining bytes and complete the upload; returns total bytes written"""
+        if self.upload_id is None:
+            self.s3_client.put_object(
+                Bucket=self.bucket, Key=self.key, Body=bytes(self.buffer),
+                ContentType=self.content_type, **self.extra_args
+            )
+            self.bytes_written += len(self.buffer)
+        else:
+            if self.buffer:
+                self._submit_part(bytes(self.buffer))
+            self.parts.extend(future.result() for future in self.pending)
+            self.pending = []
+            self.executor.shutdown()
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                MultipartUpload={'Parts': self.parts}
+            )
+            self.upload_id = None
+        self.buffer = bytearray()
+        self.closed = True
+        return self.bytes_written
+
+    def abort(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+        if self.upload_id is not None:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+            self.upload_id = None
+
+class NdjsonWriter:
+    """
+    Stream chunks of records to S3 as newline-delimited JSON
+
+    Output is gzip-compressed on the fly by default. Compact separators are used
+    since the files are read by machines, not people.
+    """
+
+    def __init__(self, s3_client, bucket, key, compress=True):
+        extra_args = {'ContentEncoding': 'gzip'} if compress else None
+        self.stream = MultipartUploadStream(s3_client, bucket, key, content_type='application/x-ndjson',
+                                            extra_args=extra_args)
+        # wbits=31 writes a gzip header and trailer
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        self.uncompressed_bytes = 0
+        self.uri = f"s3://{bucket}/{key}"
+
+    def write(self, records):
+        if not records:
+            return
+        encode = json.JSONEncoder(separators=(',', ':'), default=str).encode
+        data = ('\n'.join(map(encode, records)) + '\n').encode('utf-8')
+        self.uncompressed_bytes += len(data)
+        self.stream.write(self.compressor.compress(data) if self.compressor else data)
+
+    def close(self):
+        if self.compressor:
+            self.stream.write(self.compressor.flush())
+        return self.stream.close()
+
+    def abort(self):
+        self.stream.abort()
+
+class ParquetRecordWriter:
+    """
+    Stream chunks of records to S3 as a Snappy-compressed Parquet file
+
+    Chunks are buffered as Arrow tables and written out as one row group once
+    they reach row_group_bytes, so each row group is large enough for Athena to
+    scan efficiently. The schema is taken from the first chunk.
+    """
+
+    def __init__(self, s3_client, bucket, key, row_group_bytes=PARQUET_ROW_GROUP_BYTES):
+        # pyarrow (from requirements.txt) is slow to import, so it is only loaded when Parquet is
+        # requested. Images built from requirements-simple.txt do not include it.
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("Parquet output requires pyarrow; build the image from requirements.txt")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.stream = MultipartUploadStream(s3_client, bucket, key, content_type='application/vnd.apache.parquet')
+        self.row_group_bytes = row_group_bytes
+        self.schema = None
+        self.writer = None
+        self.pending = []
+        self.pending_bytes = 0
+        self.uncompressed_bytes = 0
+        self.uri = f"s3://{bucket}/{key}"
+
+    def write(self, records):
+        if not records:
+            return
+        if hasattr(records, 'arrow_table'):
+            # Generated batches convert column by column, without record dicts
+            table = records.arrow_table(self.schema)
+        else:
+            table = self.pa.Table.from_pylist(records, schema=self.schema)
+        if self.writer is None:
+            self.schema = table.schema
+            self.writer = self.pq.ParquetWriter(self.stream, self.schema, compression='snappy')
+        self.pending.append(table)
+        self.pending_bytes += table.nbytes
+        self.uncompressed_bytes += table.nbytes
+        if self.pending_bytes >= self.row_group_bytes:
+            self._flush_row_group()
+
+    def _flush_row_group(self):
+        table = self.pa.concat_tables(self.pending)
+        self.writer.write_table(table, row_group_size=table.num_rows)
+        self.pending = []
+        self.pending_bytes = 0
+
+    def close(self):
+        if self.writer is None:
+            return self.stream.close()
+        if self.pending:
+            self._flush_row_group()
+        self.writer.close()
+        return self.stream.close()
+
+    def abort(self):
+        self.pending = []
+        self.stream.abort()
@@ -0,0 +1,219 @@
+"""
+Approximate analytics sketches for the container Lambda function.
+HyperLogLog estimates distinct counts and a merging t-digest estimates
+quantiles, both in a few kilobytes regardless of how many rows are seen.
+Sketches serialize to JSON-friendly dicts and merge across batches, so they can
+be kept in the running analytics state between invocations.
+"""
+
+import base64
+import hashlib
+import math
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure Python paths give the same results
+    np = None
+
+class HyperLogLog:
+    """
+    Distinct-count sketch with 2**precision registers
+
+    Values are hashed with a 64-bit BLAKE2b digest, which (unlike
+    hash()) is stable across processes, so sketches built in different
+    invocations can be merged. The standard error is about 1.04 / sqrt(2**precision),
+    0.8% at the default precision of 14.
+    """
+
+    def __init__(self, precision=14, registers=None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.size)
+
+    def add_many(self, values):
+        precision = self.precision
+        width = 64 - precision
+        mask = (1 << width) - 1
+        registers = self.registers
+        # Duplicates within a batch cannot change any register, so hash each value once
+        for value in set(values):
+            digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+            hashed = int.from_bytes(digest, 'big')
+            index = hashed >> width
+            rank = width - (hashed & mask).bit_length() + 1
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog sketches with precision {self.precision} and {other.precision}")
+        if np is not None:
+            merged = np.maximum(np.frombuffer(self.registers, dtype=np.uint8),
+                                np.frombuffer(other.registers, dtype=np.uint8))
+            self.registers = bytearray(merged.tobytes())
+        else:
+            self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def estimate(self):
+        size = self.size
+        alpha = 0.7213 / (1 + 1.079 / size)
+        zeros = self.registers.count(0)
+        if np is not None:
+            harmonic = float(np.ldexp(1.0, -np.frombuffer(self.registers, dtype=np.uint8).astype(np.int32)).sum())
+        else:
+            harmonic = sum(math.ldexp(1.0, -rank) for rank in self.registers)
+        estimate = alpha * size * size / harmonic
+        # Linear counting is more accurate while many registers are still empty
+        if estimate <= 2.5 * size and zeros:
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+    def to_dict(self):
+        return {
+            'type': 'hll',
+            'precision': self.precision,
+            'registers': base64.b64encode(zlib.compress(bytes(self.registers))).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['precision'], zlib.decompress(base64.b64decode(data['registers'])))
+
+class TDigest:
+    """
+    Merging t-digest for streaming quantile estimates
+
+    Values are buffered and periodically compressed into at most about
+    compression / 2 weighted centroids. The arcsine scale function keeps
+    centroids near the tails small, so p99 and p999 stay accurate.
+    """
+
+    def __init__(self, compression=200, means=None, weights=None, minimum=None, maximum=None):
+        self.compression = compression
+        self.means = list(means or [])
+        self.weights = list(weights or [])
+        self.minimum = minimum
+        self.maximum = maximum
+        self.buffer = []
+
+    @property
+    def count(self):
+        return sum(self.weights) + len(self.buffer)
+
+    def add_many(self, values):
+        self.buffer.extend(values)
+        if len(self.buffer) >= 50 * self.compression:
+            self.compress()
+
+    def merge(self, other):
+        other.compress()
+        self.compress()
+        self._compress_points(self.means + other.means, self.weights + other.weights)
+        self.minimum = _min_of(self.minimum, other.minimum)
+        self.maximum = _max_of(self.maximum, other.maximum)
+        return self
+
+    def compress(self):
+        if not self.buffer:
+            return
+        self.minimum = _min_of(self.minimum, min(self.buffer))
+        self.maximum = _max_of(self.maximum, max(self.buffer))
+        self._compress_points(self.means + self.buffer, self.weights + [1] * len(self.buffer))
+        self.buffer = []
+
+    def _compress_points(self, means, weights):
+        """Group sorted points into centroids spanning at most one unit of the k scale"""
+        if not means:
+            return
+        scale = self.compression / (2 * math.pi)
+        if np is not None:
+            means = np.asarray(means, dtype=np.float64)
+            weights = np.asarray(weights, dtype=np.float64)
+            order = np.argsort(means, kind='stable')
+            means, weights = means[order], weights[order]
+            cumulative = np.cumsum(weights)
+            quantiles = (cumulative - weights) / cumulative[-1]
+            k = scale * np.arcsin(np.clip(2 * quantiles - 1, -1, 1))
+            clusters = np.floor(k - k[0]).astype(np.int64)
+            clusters = np.unique(clusters, return_inverse=True)[1]
+            totals = np.bincount(clusters, weights=weights)
+            self.means = (np.bincount(clusters, weights=means * weights) / totals).tolist()
+            self.weights = totals.tolist()
+            return
+
+        points = sorted(zip(means, weights))
+        total = sum(weight for _, weight in points)
+        first_k = None
+        cumulative = 0.0
+        merged_means, merged_weights = [], []
+        current = None
+        for mean, weight in points:
+            k = scale * math.asin(max(-1.0, min(1.0, 2 * cumulative / total - 1)))
+            if first_k is None:
+                first_k = k
+            cluster = math.floor(k - first_k)
+            if current == cluster:
+                merged_weights[-1] += weight
+                merged_means[-1] += (mean - merged_means[-1]) * weight / merged_weights[-1]
+            else:
+                current = cluster
+                merged_means.append(mean)
+                merged_weights.append(weight)
+            cumulative += weight
+        self.means, self.weights = merged_means, merged_weights
+
+    def quantile(self, q):
+        """Estimated value at quantile q (0-1) by interpolating between centroid centres"""
+        self.compress()
+        if not self.weights:
+            return None
+        total = sum(self.weights)
+        target = q * total
+        # Each centroid's mean sits at the middle of its weight; the extremes are exact
+        positions = [0.0]
+        values = [self.minimum]
+        cumulative = 0.0
+        for mean, weight in zip(self.means, self.weights):
+            positions.append(cumulative + weight / 2)
+            values.append(mean)
+            cumulative += weight
+        positions.append(total)
+        values.append(self.maximum)
+        for i in range(1, len(positions)):
+            if target <= positions[i]:
+                span = positions[i] - positions[i - 1]
+                fraction = (target - positions[i - 1]) / span if span else 0
+                return values[i - 1] + (values[i] - values[i - 1]) * fraction
+        return self.maximum
+
+    def to_dict(self):
+        self.compress()
+        return {
+            'type': 'tdigest',
+            'compression': self.compression,
+            'means': self.means,
+            'weights': self.weights,
+            'min': self.minimum,
+            'max': self.maximum
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['compression'], data['means'], data['weights'], data['min'], data['max'])
+
+def _min_of(a, b):
+    return b if a is None else a if b is None else min(a, b)
+
+def _max_of(a, b):
+    return b if a is None else a if b is None else max(a, b)
+
+SKETCH_TYPES = {'hll': HyperLogLog, 'tdigest': TDigest}
+
+def sketch_from_dict(data):
+    return SKETCH_TYPES[data['type']].from_dict(data)
+
+def merge_sketch_dicts(left, right):
+    """Merge two serialized sketches of the same type into a new serialized sketch"""
+    return sketch_from_dict(left).merge(sketch_from_dict(right)).to_dict()
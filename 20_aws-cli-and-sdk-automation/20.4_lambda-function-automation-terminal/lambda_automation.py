@@ -4,19 +4,141 @@ AWS Lambda Function Automation Script
 Demonstrates automated Lambda deployment, management, and monitoring
 """
 
+import argparse
+import base64
 import boto3
 import json
+import re
+import threading
 import time
 import zipfile
 import os
 import logging
+import math
+import random
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+# Matches the fields Lambda writes on the REPORT line at the end of every invocation
+REPORT_FIELDS = {
+    'duration_ms': re.compile(r'\tDuration: ([\d.]+) ms'),
+    'billed_duration_ms': re.compile(r'Billed Duration: ([\d.]+) ms'),
+    'memory_size_mb': re.compile(r'Memory Size: (\d+) MB'),
+    'max_memory_used_mb': re.compile(r'Max Memory Used: (\d+) MB'),
+    'init_duration_ms': re.compile(r'Init Duration: ([\d.]+) ms'),
+}
+
+# On-demand Lambda pricing (us-east-1) used to estimate cost per invocation
+PRICE_PER_GB_SECOND = {'x86_64': 0.0000166667, 'arm64': 0.0000133334}
+PRICE_PER_REQUEST = 0.20 / 1000000
+PROVISIONED_PRICE_PER_GB_SECOND = {'x86_64': 0.0000041667, 'arm64': 0.0000033334}
+
+# Memory sizes swept by the power tuning command
+DEFAULT_TUNING_MEMORY_SIZES = [128, 256, 512, 1024, 1536, 2048, 3008]
+
+# Tag applied to every resource this script creates, used by the sweep command
+DEMO_TAG = {'Key': 'CreatedBy', 'Value': 'LambdaAutomation'}
+
+# Name the script generates for execution roles; roles from runs before roles were
+# tagged are matched by this exact pattern instead
+UNTAGGED_ROLE_NAME = re.compile(r'^demo-lambda-role-\d{8}-\d{6}$')
+
+# Error codes worth retrying during bulk deletion (throttling and IAM eventual consistency)
+RETRYABLE_ERRORS = {
+    'Throttling', 'ThrottlingException', 'TooManyRequestsException',
+    'DeleteConflict', 'ConcurrentModification', 'ResourceConflictException'
+}
+
+def trusts_lambda(role):
+    """True when a role's trust policy lets the Lambda service assume it"""
+    for statement in role.get('AssumeRolePolicyDocument', {}).get('Statement', []):
+        services = statement.get('Principal', {}).get('Service', [])
+        if isinstance(services, str):
+            services = [services]
+        if statement.get('Effect') == 'Allow' and 'lambda.amazonaws.com' in services:
+            return True
+    return False
+
+def parse_report_line(log_text):
+    """Extract duration and memory metrics from a Lambda REPORT log line"""
+    for line in log_text.splitlines():
+        if line.startswith('REPORT '):
+            metrics = {}
+            for field, pattern in REPORT_FIELDS.items():
+                match = pattern.search(line)
+                if match:
+                    metrics[field] = float(match.group(1))
+            return metrics
+    return None
+
+def call_with_retries(func, max_retries=5, **kwargs):
+    """Call an AWS API, backing off exponentially (with jitter) on retryable errors"""
+    for attempt in range(max_retries + 1):
+        try:
+            return func(**kwargs)
+        except ClientError as e:
+            if e.response['Error']['Code'] not in RETRYABLE_ERRORS or attempt == max_retries:
+                raise
+            time.sleep(min(10, 0.2 * 2 ** attempt) * random.uniform(0.5, 1.0))
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+def summarize(values):
+    """Summary statistics used in load test reports"""
+    if not values:
+        return None
+    return {
+        'p50': round(percentile(values, 50), 2),
+        'p90': round(percentile(values, 90), 2),
+        'p99': round(percentile(values, 99), 2),
+        'max': round(max(values), 2),
+        'mean': round(sum(values) / len(values), 2)
+    }
+
+class RollingMetrics:
+    """In-memory REPORT line metrics aggregated over rolling time windows"""
+    
+    def __init__(self, windows=(60, 300)):
+        self.windows = sorted(windows)
+        self.samples = deque()
+    
+    def add(self, timestamp_ms, metrics):
+        self.samples.append((timestamp_ms, metrics))
+        # Only keep what the largest window needs
+        cutoff = timestamp_ms - self.windows[-1] * 1000
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+    
+    def snapshot(self, now_ms):
+        """Aggregate statistics for each window ending at now_ms"""
+        result = {}
+        for window in self.windows:
+            cutoff = now_ms - window * 1000
+            metrics = [m for ts, m in self.samples if ts >= cutoff]
+            memory_used = [m['max_memory_used_mb'] for m in metrics if 'max_memory_used_mb' in m]
+            result[f'{window}s'] = {
+                'invocations': len(metrics),
+                'cold_starts': sum(1 for m in metrics if 'init_duration_ms' in m),
+                'duration_ms': summarize([m['duration_ms'] for m in metrics if 'duration_ms' in m]),
+                'billed_duration_ms': summarize([m['billed_duration_ms'] for m in metrics if 'billed_duration_ms' in m]),
+                'max_memory_used_mb': max(memory_used) if memory_used else None,
+                'memory_size_mb': metrics[-1].get('memory_size_mb') if metrics else None
+            }
+        return result
+
 class LambdaAutomation:
     """AWS Lambda automation and management class"""
     
-    def __init__(self, region='us-east-1'):
+    def __init__(self, region='us-east-1', function_name=None):
         self.region = region
         self.timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
         
@@ -34,7 +156,7 @@ class LambdaAutomation:
         self.sts_client = boto3.client('sts')
         
         # Configuration
-        self.function_name = f'demo-lambda-function-{self.timestamp}'
+        self.function_name = function_name or f'demo-lambda-function-{self.timestamp}'
         self.role_name = f'demo-lambda-role-{self.timestamp}'
         
         self.verify_credentials()
@@ -72,7 +194,8 @@ class LambdaAutomation:
             response = self.iam_client.create_role(
                 RoleName=self.role_name,
                 AssumeRolePolicyDocument=json.dumps(trust_policy),
-                Description='Demo Lambda execution role'
+                Description='Demo Lambda execution role',
+                Tags=[DEMO_TAG, {'Key': 'Timestamp', 'Value': self.timestamp}]
             )
             
             role_arn = response['Role']['Arn']
@@ -117,7 +240,7 @@ class LambdaAutomation:
             self.logger.error(f"Failed to create deployment package: {e}")
             raise
     
-    def deploy_lambda_function(self, role_arn, zip_filename):
+    def deploy_lambda_function(self, role_arn, zip_filename, memory_size=128, timeout=30):
         """Deploy Lambda function"""
         try:
             self.logger.info(f"Deploying Lambda function: {self.function_name}")
@@ -132,17 +255,18 @@ class LambdaAutomation:
                 Handler='lambda_function.lambda_handler',
                 Code={'ZipFile': zip_content},
                 Description='Demo Lambda function for automation',
-                Timeout=30,
-                MemorySize=128,
+                Timeout=timeout,
+                MemorySize=memory_size,
                 Environment={
                     'Variables': {
                         'ENVIRONMENT': 'demo',
-                        'TIMESTAMP': self.timestamp
+                        'TIMESTAMP': self.timestamp,
+                        'LOG_SAMPLE_RATE': '0.01'
                     }
                 },
                 Tags={
                     'Environment': 'Demo',
-                    'CreatedBy': 'LambdaAutomation',
+                    DEMO_TAG['Key']: DEMO_TAG['Value'],
                     'Timestamp': self.timestamp
                 }
             )
@@ -231,8 +355,478 @@ class LambdaAutomation:
             self.logger.error(f"Failed to test Lambda function: {e}")
             raise
     
-    def monitor_lambda_function(self):
+    def invoke_with_metrics(self, client, event, qualifier=None):
+        """Invoke the function once and return client latency plus REPORT line metrics"""
+        params = {
+            'FunctionName': self.function_name,
+            'InvocationType': 'RequestResponse',
+            'LogType': 'Tail',
+            'Payload': json.dumps(event)
+        }
+        if qualifier:
+            params['Qualifier'] = qualifier
+        
+        start = time.perf_counter()
+        try:
+            response = client.invoke(**params)
+            response['Payload'].read()
+        except ClientError as e:
+            return {
+                'latency_ms': (time.perf_counter() - start) * 1000,
+                'error': e.response['Error']['Code']
+            }
+        
+        result = {'latency_ms': (time.perf_counter() - start) * 1000}
+        if 'FunctionError' in response:
+            result['error'] = response['FunctionError']
+        
+        # LogResult holds the last 4 KB of the execution log, base64 encoded
+        log_tail = base64.b64decode(response.get('LogResult', '')).decode('utf-8', 'replace')
+        result.update(parse_report_line(log_tail) or {})
+        return result
+    
+    def load_test_lambda_function(self, event=None, concurrency=10, duration=30, rate=None,
+                                  qualifier=None, invocations=None):
+        """
+        Invoke the function at a target concurrency (or rate) for a fixed duration
+        and report latency percentiles, cold-start rate and throughput
+        
+        When invocations is set the test also stops after that many calls, which gives
+        every run the same fixed workload.
+        """
+        event = event or {'action': 'health_check'}
+        target = f"{rate} req/s" if rate else f"concurrency {concurrency}"
+        limit = f", max {invocations} invocations" if invocations else ""
+        self.logger.info(f"Load testing {self.function_name}:{qualifier or '$LATEST'} for {duration}s at {target}{limit}")
+        
+        # The default connection pool (10) would otherwise cap concurrency. A private
+        # session keeps client creation thread-safe when several load tests run at once
+        client = boto3.session.Session().client(
+            'lambda',
+            region_name=self.region,
+            config=Config(max_pool_connections=concurrency, retries={'max_attempts': 0})
+        )
+        
+        results = []
+        results_lock = threading.Lock()
+        deadline = time.monotonic() + duration
+        remaining = [invocations if invocations else float('inf')]
+        
+        def record(result):
+            with results_lock:
+                results.append(result)
+        
+        def take_ticket():
+            with results_lock:
+                if remaining[0] <= 0:
+                    return False
+                remaining[0] -= 1
+                return True
+        
+        def scheduled_invoke():
+            # Invocations still queued behind a saturated pool at the deadline are dropped
+            if time.monotonic() < deadline:
+                record(self.invoke_with_metrics(client, event, qualifier))
+        
+        def worker():
+            # Closed loop: each worker invokes back-to-back until the deadline
+            while time.monotonic() < deadline and take_ticket():
+                record(self.invoke_with_metrics(client, event, qualifier))
+        
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            if rate:
+                # Open loop: schedule invocations at a fixed interval, bounded by the pool size
+                interval = 1.0 / rate
+                next_send = started
+                while next_send < deadline and take_ticket():
+                    delay = next_send - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    executor.submit(scheduled_invoke)
+                    next_send += interval
+            else:
+                for _ in range(concurrency):
+                    executor.submit(worker)
+        elapsed = time.monotonic() - started
+        
+        report = self.build_load_test_report(results, elapsed)
+        report['qualifier'] = qualifier or '$LATEST'
+        self.log_load_test_report(report)
+        return report
+    
+    def build_load_test_report(self, results, elapsed):
+        """Aggregate per-invocation results into a load test report"""
+        succeeded = [r for r in results if 'error' not in r]
+        cold = [r for r in succeeded if 'init_duration_ms' in r]
+        errors = {}
+        for r in results:
+            if 'error' in r:
+                errors[r['error']] = errors.get(r['error'], 0) + 1
+        
+        return {
+            'invocations': len(results),
+            'errors': errors,
+            'elapsed_seconds': round(elapsed, 2),
+            'throughput_rps': round(len(results) / elapsed, 2) if elapsed else 0,
+            'cold_starts': len(cold),
+            'cold_start_rate': round(len(cold) / len(succeeded), 4) if succeeded else 0,
+            'client_latency_ms': summarize([r['latency_ms'] for r in succeeded]),
+            'duration_ms': summarize([r['duration_ms'] for r in succeeded if 'duration_ms' in r]),
+            'billed_duration_ms': summarize([r['billed_duration_ms'] for r in succeeded if 'billed_duration_ms' in r]),
+            'init_duration_ms': summarize([r['init_duration_ms'] for r in cold])
+        }
+    
+    def log_load_test_report(self, report):
+        """Log a load test report in a readable form"""
+        self.logger.info(
+            f"Invocations: {report['invocations']} in {report['elapsed_seconds']}s "
+            f"({report['throughput_rps']} req/s), errors: {report['errors'] or 'none'}"
+        )
+        self.logger.info(f"Cold starts: {report['cold_starts']} ({report['cold_start_rate']:.2%})")
+        for key in ('client_latency_ms', 'duration_ms', 'billed_duration_ms', 'init_duration_ms'):
+            stats = report[key]
+            if stats:
+                self.logger.info(
+                    f"  {key:<20} p50={stats['p50']} p90={stats['p90']} p99={stats['p99']} max={stats['max']}"
+                )
+    
+    def publish_version(self, description=None):
+        """Publish the current $LATEST code and configuration as a new version"""
+        self.lambda_client.get_waiter('function_updated').wait(FunctionName=self.function_name)
+        params = {'FunctionName': self.function_name}
+        if description:
+            params['Description'] = description
+        version = self.lambda_client.publish_version(**params)['Version']
+        self.logger.info(f"Published version {version}")
+        return version
+    
+    def list_version_numbers(self):
+        """Published version numbers of the function (excluding $LATEST)"""
+        versions = set()
+        paginator = self.lambda_client.get_paginator('list_versions_by_function')
+        for page in paginator.paginate(FunctionName=self.function_name):
+            versions.update(v['Version'] for v in page['Versions'] if v['Version'] != '$LATEST')
+        return versions
+    
+    def alias_version(self, alias_name):
+        """Version an alias currently points to, or None if the alias does not exist"""
+        try:
+            return self.lambda_client.get_alias(FunctionName=self.function_name, Name=alias_name)['FunctionVersion']
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ResourceNotFoundException':
+                raise
+            return None
+    
+    def point_alias(self, alias_name, version):
+        """Create the alias, or move it to the given version if it already exists"""
+        try:
+            self.lambda_client.create_alias(
+                FunctionName=self.function_name,
+                Name=alias_name,
+                FunctionVersion=version
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ResourceConflictException':
+                raise
+            self.lambda_client.update_alias(
+                FunctionName=self.function_name,
+                Name=alias_name,
+                FunctionVersion=version
+            )
+        self.logger.info(f"Alias {alias_name} -> version {version}")
+    
+    def set_provisioned_concurrency(self, alias_name, concurrency, timeout=600):
+        """Configure provisioned concurrency on an alias and wait until it is READY"""
+        try:
+            self.logger.info(f"Setting provisioned concurrency on {alias_name} to {concurrency}")
+            self.lambda_client.put_provisioned_concurrency_config(
+                FunctionName=self.function_name,
+                Qualifier=alias_name,
+                ProvisionedConcurrentExecutions=concurrency
+            )
+            
+            start_time = time.time()
+            while time.time() - start_time < timeout:
+                config = self.lambda_client.get_provisioned_concurrency_config(
+                    FunctionName=self.function_name,
+                    Qualifier=alias_name
+                )
+                status = config['Status']
+                self.logger.info(
+                    f"Provisioned concurrency status: {status} "
+                    f"({config.get('AvailableProvisionedConcurrentExecutions', 0)}/{concurrency} available)"
+                )
+                if status == 'READY':
+                    return config
+                if status == 'FAILED':
+                    raise Exception(f"Provisioned concurrency failed: {config.get('StatusReason', 'Unknown error')}")
+                time.sleep(10)
+            
+            raise Exception(f"Provisioned concurrency was not ready within {timeout} seconds")
+            
+        except ClientError as e:
+            self.logger.error(f"Failed to set provisioned concurrency: {e}")
+            raise
+    
+    def schedule_provisioned_concurrency(self, alias_name, min_capacity, max_capacity,
+                                         scale_up_cron, scale_down_cron, timezone='UTC'):
+        """
+        Scale provisioned concurrency on a schedule with Application Auto Scaling
+        
+        The alias is held at max_capacity from scale_up_cron until scale_down_cron and
+        at min_capacity otherwise, so the warm capacity is only paid for when needed.
+        """
+        autoscaling = boto3.client('application-autoscaling', region_name=self.region)
+        target = {
+            'ServiceNamespace': 'lambda',
+            'ResourceId': f'function:{self.function_name}:{alias_name}',
+            'ScalableDimension': 'lambda:function:ProvisionedConcurrency'
+        }
+        try:
+            autoscaling.register_scalable_target(MinCapacity=min_capacity, MaxCapacity=max_capacity, **target)
+            for action, cron, capacity in (('scale-up', scale_up_cron, max_capacity),
+                                           ('scale-down', scale_down_cron, min_capacity)):
+                autoscaling.put_scheduled_action(
+                    ScheduledActionName=f'{self.function_name}-{alias_name}-{action}',
+                    Schedule=f'cron({cron})',
+                    Timezone=timezone,
+                    ScalableTargetAction={'MinCapacity': capacity, 'MaxCapacity': capacity},
+                    **target
+                )
+                self.logger.info(f"Scheduled {action} to {capacity} at cron({cron}) {timezone}")
+        except ClientError as e:
+            self.logger.error(f"Failed to schedule provisioned concurrency: {e}")
+            raise
+    
+    def remove_provisioned_concurrency(self, alias_name):
+        """Remove provisioned concurrency and any scaling schedule from an alias"""
+        autoscaling = boto3.client('application-autoscaling', region_name=self.region)
+        try:
+            autoscaling.deregister_scalable_target(
+                ServiceNamespace='lambda',
+                ResourceId=f'function:{self.function_name}:{alias_name}',
+                ScalableDimension='lambda:function:ProvisionedConcurrency'
+            )
+            self.logger.info(f"Removed scaling schedule from {alias_name}")
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ObjectNotFoundException':
+                raise
+        try:
+            self.lambda_client.delete_provisioned_concurrency_config(
+                FunctionName=self.function_name,
+                Qualifier=alias_name
+            )
+            self.logger.info(f"Removed provisioned concurrency from {alias_name}")
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ProvisionedConcurrencyConfigNotFoundException':
+                raise
+    
+    def compare_provisioned_concurrency(self, alias_name, baseline_qualifier='$LATEST', event=None,
+                                        concurrency=10, duration=30):
+        """
+        Load test the provisioned alias and an unprovisioned baseline with the same workload
+        
+        Reports the latency and cold-start difference next to the monthly price of keeping
+        the provisioned capacity warm.
+        """
+        try:
+            provisioned = self.lambda_client.get_provisioned_concurrency_config(
+                FunctionName=self.function_name,
+                Qualifier=alias_name
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ProvisionedConcurrencyConfigNotFoundException':
+                raise
+            # For example a schedule currently at a minimum capacity of 0
+            self.logger.warning(f"{alias_name} has no provisioned concurrency; comparing unprovisioned capacity")
+            provisioned = {}
+        config = self.lambda_client.get_function_configuration(
+            FunctionName=self.function_name,
+            Qualifier=alias_name
+        )
+        
+        baseline = self.load_test_lambda_function(event=event, concurrency=concurrency,
+                                                  duration=duration, qualifier=baseline_qualifier)
+        with_pc = self.load_test_lambda_function(event=event, concurrency=concurrency,
+                                                 duration=duration, qualifier=alias_name)
+        
+        allocated = provisioned.get('AllocatedProvisionedConcurrentExecutions', 0)
+        architecture = config.get('Architectures', ['x86_64'])[0]
+        gb_seconds_per_month = allocated * (config['MemorySize'] / 1024.0) * 3600 * 24 * 30
+        monthly_cost = gb_seconds_per_month * PROVISIONED_PRICE_PER_GB_SECOND[architecture]
+        
+        comparison = {'baseline': baseline, 'provisioned': with_pc,
+                      'provisioned_concurrency': allocated,
+                      'provisioned_monthly_cost': round(monthly_cost, 2)}
+        
+        self.logger.info(f"{'':<22}{baseline_qualifier:>14}{alias_name:>14}")
+        self.logger.info(f"{'cold start rate':<22}{baseline['cold_start_rate']:>14.2%}{with_pc['cold_start_rate']:>14.2%}")
+        for pct in ('p50', 'p90', 'p99'):
+            base_latency = (baseline['client_latency_ms'] or {}).get(pct)
+            pc_latency = (with_pc['client_latency_ms'] or {}).get(pct)
+            self.logger.info(f"{'client latency ' + pct + ' ms':<22}{str(base_latency):>14}{str(pc_latency):>14}")
+        self.logger.info(f"Keeping {allocated} provisioned environments warm costs about ${monthly_cost:.2f}/month")
+        return comparison
+    
+    def publish_memory_versions(self, memory_sizes, aliases):
+        """
+        Publish one version per memory size and point a tune-<MB> alias at each
+        
+        Entries are added to aliases as they are created, so a caller can clean up
+        after a failure partway through. publish_version returns the existing version
+        when $LATEST is unchanged since it was published, so such versions are marked
+        as not created by this run. Aliases that already existed keep their previous
+        version so cleanup can point them back.
+        """
+        existing_versions = self.list_version_numbers()
+        # A function that was just created or updated rejects configuration changes until it is ready
+        self.lambda_client.get_waiter('function_updated').wait(FunctionName=self.function_name)
+        for memory_size in memory_sizes:
+            self.lambda_client.update_function_configuration(
+                FunctionName=self.function_name,
+                MemorySize=memory_size
+            )
+            self.lambda_client.get_waiter('function_updated').wait(FunctionName=self.function_name)
+            
+            version = self.publish_version(f'Power tuning at {memory_size} MB')
+            alias_name = f'tune-{memory_size}'
+            aliases[memory_size] = {
+                'alias': alias_name,
+                'version': version,
+                'version_created': version not in existing_versions,
+                'previous_version': self.alias_version(alias_name)
+            }
+            existing_versions.add(version)
+            self.point_alias(alias_name, version)
+            
+            self.logger.info(f"Published version {version} at {memory_size} MB as alias {alias_name}")
+        return aliases
+    
+    def power_tune_lambda_function(self, memory_sizes=None, event=None, invocations=50,
+                                   concurrency=5, latency_target_ms=None, latency_percentile='p90',
+                                   keep_versions=False):
+        """
+        Measure cost and latency across memory sizes and recommend the cheapest
+        configuration that meets the latency target
+        
+        Memory is a function-wide setting, so versions are published one after the other.
+        The invocation workloads then run against all tune-<MB> aliases in parallel.
+        Memory sizes with failed invocations are never recommended.
+        """
+        memory_sizes = memory_sizes or DEFAULT_TUNING_MEMORY_SIZES
+        config = self.lambda_client.get_function_configuration(FunctionName=self.function_name)
+        original_memory = config['MemorySize']
+        architecture = config.get('Architectures', ['x86_64'])[0]
+        aliases = {}
+        try:
+            self.logger.info(f"Power tuning {self.function_name} across {memory_sizes} MB")
+            self.publish_memory_versions(memory_sizes, aliases)
+            
+            # Memory is a $LATEST setting, so restore it as soon as the versions exist
+            self.restore_memory_size(original_memory)
+            
+            with ThreadPoolExecutor(max_workers=len(memory_sizes)) as executor:
+                futures = {
+                    memory_size: executor.submit(
+                        self.load_test_lambda_function,
+                        event=event,
+                        concurrency=concurrency,
+                        duration=900,
+                        qualifier=info['alias'],
+                        invocations=invocations
+                    )
+                    for memory_size, info in aliases.items()
+                }
+                reports = {memory_size: future.result() for memory_size, future in futures.items()}
+        except ClientError as e:
+            self.logger.error(f"Failed to power tune Lambda function: {e}")
+            raise
+        finally:
+            # Runs on failure too, so a partial run never leaves $LATEST resized or versions behind
+            self.restore_memory_size(original_memory)
+            if not keep_versions:
+                self.delete_tuning_versions(aliases)
+        
+        results = []
+        for memory_size in memory_sizes:
+            report = reports[memory_size]
+            billed = report['billed_duration_ms']
+            duration = report['duration_ms']
+            if not billed or not duration:
+                self.logger.warning(f"No successful invocations at {memory_size} MB")
+                continue
+            
+            gb_seconds = (memory_size / 1024.0) * (billed['mean'] / 1000.0)
+            cost = gb_seconds * PRICE_PER_GB_SECOND[architecture] + PRICE_PER_REQUEST
+            results.append({
+                'memory_size_mb': memory_size,
+                'version': aliases[memory_size]['version'],
+                'latency_ms': duration[latency_percentile],
+                'billed_duration_ms': billed['mean'],
+                'cost_per_invocation': cost,
+                'cost_per_million': round(cost * 1000000, 4),
+                'errors': report['errors']
+            })
+        
+        # A size that runs out of memory or times out must not win on cost
+        eligible = [
+            r for r in results
+            if not r['errors'] and (latency_target_ms is None or r['latency_ms'] <= latency_target_ms)
+        ]
+        recommendation = min(eligible, key=lambda r: (r['cost_per_invocation'], r['latency_ms'])) if eligible else None
+        
+        self.logger.info(f"{'Memory':>8} {'Duration ' + latency_percentile:>14} {'Billed avg':>11} {'$/1M invokes':>13}")
+        for r in results:
+            marker = '  <- recommended' if r is recommendation else ''
+            if r['errors']:
+                marker = f"  errors: {r['errors']}"
+            self.logger.info(
+                f"{r['memory_size_mb']:>6}MB {r['latency_ms']:>12.1f}ms {r['billed_duration_ms']:>9.1f}ms "
+                f"{r['cost_per_million']:>13.4f}{marker}"
+            )
+        if recommendation is None:
+            self.logger.warning(f"No error-free memory size met the {latency_percentile} target of {latency_target_ms} ms")
+        
+        return {
+            'architecture': architecture,
+            'latency_target_ms': latency_target_ms,
+            'latency_percentile': latency_percentile,
+            'results': results,
+            'recommendation': recommendation
+        }
+    
+    def restore_memory_size(self, memory_size):
+        """Set $LATEST back to its original memory size, if a tuning step changed it"""
+        try:
+            current = self.lambda_client.get_function_configuration(FunctionName=self.function_name)
+            if current['MemorySize'] != memory_size:
+                self.lambda_client.get_waiter('function_updated').wait(FunctionName=self.function_name)
+                self.lambda_client.update_function_configuration(
+                    FunctionName=self.function_name,
+                    MemorySize=memory_size
+                )
+        except ClientError as e:
+            self.logger.warning(f"Could not restore memory size to {memory_size} MB: {e}")
+    
+    def delete_tuning_versions(self, aliases):
+        """Remove the aliases and versions created by a power tuning run, and nothing else"""
+        for info in aliases.values():
+            try:
+                if info['previous_version'] is None:
+                    self.lambda_client.delete_alias(FunctionName=self.function_name, Name=info['alias'])
+                else:
+                    self.point_alias(info['alias'], info['previous_version'])
+                if info['version_created']:
+                    self.lambda_client.delete_function(FunctionName=self.function_name, Qualifier=info['version'])
+            except ClientError as e:
+                self.logger.warning(f"Could not delete {info['alias']}: {e}")
+    
+    def monitor_lambda_function(self, follow=False, **follow_options):
         """Monitor Lambda function metrics and logs"""
+        if follow:
+            return self.follow_lambda_logs(**follow_options)
+        
         try:
             self.logger.info("Monitoring Lambda function")
             
@@ -273,6 +867,90 @@ class LambdaAutomation:
             self.logger.error(f"Failed to monitor Lambda function: {e}")
             raise
     
+    def follow_lambda_logs(self, poll_interval=5, windows=(60, 300), duration=None,
+                           checkpoint_file=None, overlap_seconds=30):
+        """
+        Tail the function's log group across all streams and aggregate REPORT line metrics
+        
+        Each poll pages through filter_log_events from a checkpointed start time. The query
+        overlaps the previous one so late-ingested events are not missed, and event IDs
+        already seen are skipped so nothing is reported twice. The checkpoint file stores
+        the IDs inside the overlap window with the timestamp, so this also holds for a
+        resumed run.
+        """
+        log_group_name = f'/aws/lambda/{self.function_name}'
+        paginator = self.logs_client.get_paginator('filter_log_events')
+        rolling = RollingMetrics(windows)
+        overlap_ms = overlap_seconds * 1000
+        
+        checkpoint = int(time.time() * 1000)
+        seen = {}  # eventId -> timestamp, limited to the overlap period
+        if checkpoint_file and os.path.exists(checkpoint_file):
+            with open(checkpoint_file) as f:
+                saved = json.load(f)
+            checkpoint = saved['checkpoint']
+            seen = saved.get('seen', {})
+            self.logger.info(f"Resuming from checkpoint {datetime.fromtimestamp(checkpoint / 1000)}")
+        
+        def save_checkpoint():
+            if checkpoint_file:
+                with open(checkpoint_file, 'w') as f:
+                    json.dump({'checkpoint': checkpoint, 'seen': seen}, f)
+        
+        stop_at = time.monotonic() + duration if duration else None
+        self.logger.info(f"Following {log_group_name} (Ctrl+C to stop)")
+        
+        try:
+            while stop_at is None or time.monotonic() < stop_at:
+                start_time = checkpoint - overlap_ms
+                try:
+                    pages = paginator.paginate(
+                        logGroupName=log_group_name,
+                        startTime=start_time,
+                        filterPattern='"REPORT RequestId"'
+                    )
+                    for page in pages:
+                        for event in page['events']:
+                            if event['eventId'] in seen:
+                                continue
+                            seen[event['eventId']] = event['timestamp']
+                            checkpoint = max(checkpoint, event['timestamp'])
+                            
+                            metrics = parse_report_line(event['message'])
+                            if metrics:
+                                rolling.add(event['timestamp'], metrics)
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ResourceNotFoundException':
+                        raise
+                    self.logger.info("Log group does not exist yet, waiting for first invocation")
+                
+                # Only events inside the next query's overlap can be returned again
+                seen = {eid: ts for eid, ts in seen.items() if ts >= checkpoint - overlap_ms}
+                save_checkpoint()
+                
+                self.log_rolling_metrics(rolling.snapshot(int(time.time() * 1000)))
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            self.logger.info("Stopped following logs")
+        finally:
+            # Also covers events counted in a poll that was interrupted
+            save_checkpoint()
+        
+        return rolling.snapshot(int(time.time() * 1000))
+    
+    def log_rolling_metrics(self, snapshot):
+        """Log one line per rolling window"""
+        for window, stats in snapshot.items():
+            duration = stats['duration_ms']
+            if not duration:
+                self.logger.info(f"[{window}] no invocations")
+                continue
+            self.logger.info(
+                f"[{window}] invocations={stats['invocations']} cold={stats['cold_starts']} "
+                f"duration p50={duration['p50']} p99={duration['p99']} ms "
+                f"memory={stats['max_memory_used_mb']:.0f}/{stats['memory_size_mb']:.0f} MB"
+            )
+    
     def update_lambda_function(self):
         """Demonstrate function updates"""
         try:
@@ -285,6 +963,7 @@ class LambdaAutomation:
                     'Variables': {
                         'ENVIRONMENT': 'demo',
                         'TIMESTAMP': self.timestamp,
+                        'LOG_SAMPLE_RATE': '0.01',
                         'UPDATED_AT': datetime.utcnow().isoformat()
                     }
                 },
@@ -309,28 +988,10 @@ class LambdaAutomation:
             except ClientError as e:
                 self.logger.warning(f"Could not delete function: {e}")
             
-            # Wait a moment for function deletion
-            time.sleep(5)
-            
-            # Detach policies and delete role
+            # IAM does not wait for the function to be gone, so no delay is needed here
             try:
-                policies = [
-                    'arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole',
-                    'arn:aws:iam::aws:policy/AmazonS3ReadOnlyAccess'
-                ]
-                
-                for policy in policies:
-                    try:
-                        self.iam_client.detach_role_policy(
-                            RoleName=self.role_name,
-                            PolicyArn=policy
-                        )
-                    except ClientError:
-                        pass
-                
-                self.iam_client.delete_role(RoleName=self.role_name)
+                self.delete_role_and_policies(self.iam_client, self.role_name)
                 self.logger.info(f"Deleted IAM role: {self.role_name}")
-                
             except ClientError as e:
                 self.logger.warning(f"Could not delete role: {e}")
             
@@ -343,11 +1004,354 @@ class LambdaAutomation:
         except Exception as e:
             self.logger.error(f"Cleanup failed: {e}")
 
+    def delete_role_and_policies(self, iam_client, role_name, max_retries=5):
+        """Detach managed policies, delete inline policies, then delete the role"""
+        paginator = iam_client.get_paginator('list_attached_role_policies')
+        for page in paginator.paginate(RoleName=role_name):
+            for policy in page['AttachedPolicies']:
+                call_with_retries(iam_client.detach_role_policy, max_retries,
+                                  RoleName=role_name, PolicyArn=policy['PolicyArn'])
+        
+        paginator = iam_client.get_paginator('list_role_policies')
+        for page in paginator.paginate(RoleName=role_name):
+            for policy_name in page['PolicyNames']:
+                call_with_retries(iam_client.delete_role_policy, max_retries,
+                                  RoleName=role_name, PolicyName=policy_name)
+        
+        call_with_retries(iam_client.delete_role, max_retries, RoleName=role_name)
+    
+    def find_demo_resources(self, lambda_client, iam_client, workers=10,
+                            function_prefix='demo-lambda-function-', role_prefix='demo-lambda-role-',
+                            include_untagged_roles=True):
+        """
+        Find functions and roles tagged CreatedBy=LambdaAutomation
+        
+        Neither list_functions nor list_roles returns tags, so candidates are narrowed by
+        name prefix first and their tags are then fetched in parallel. Earlier versions of
+        this script did not tag roles, so untagged roles are also matched when their name
+        is exactly a generated demo role name and they trust lambda.amazonaws.com.
+        """
+        candidate_functions = []
+        for page in lambda_client.get_paginator('list_functions').paginate():
+            candidate_functions.extend(
+                f for f in page['Functions'] if f['FunctionName'].startswith(function_prefix)
+            )
+        
+        candidate_roles = []
+        generated_roles = set()
+        for page in iam_client.get_paginator('list_roles').paginate():
+            for role in page['Roles']:
+                if not role['RoleName'].startswith(role_prefix):
+                    continue
+                candidate_roles.append(role['RoleName'])
+                if UNTAGGED_ROLE_NAME.match(role['RoleName']) and trusts_lambda(role):
+                    generated_roles.add(role['RoleName'])
+        
+        def function_is_tagged(function):
+            tags = call_with_retries(lambda_client.list_tags, Resource=function['FunctionArn'])['Tags']
+            return tags.get(DEMO_TAG['Key']) == DEMO_TAG['Value']
+        
+        def role_is_tagged(role_name):
+            tags = call_with_retries(iam_client.list_role_tags, RoleName=role_name)['Tags']
+            if not tags and include_untagged_roles and role_name in generated_roles:
+                return True
+            return any(t['Key'] == DEMO_TAG['Key'] and t['Value'] == DEMO_TAG['Value'] for t in tags)
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            function_flags = list(executor.map(function_is_tagged, candidate_functions))
+            role_flags = list(executor.map(role_is_tagged, candidate_roles))
+        
+        functions = [f['FunctionName'] for f, tagged in zip(candidate_functions, function_flags) if tagged]
+        roles = [r for r, tagged in zip(candidate_roles, role_flags) if tagged]
+        return functions, roles
+    
+    def sweep_demo_resources(self, dry_run=False, workers=10, max_retries=5, include_untagged_roles=True):
+        """Delete every tagged demo function and role, including leftovers from interrupted runs"""
+        client_config = Config(max_pool_connections=workers, retries={'mode': 'adaptive', 'max_attempts': 5})
+        lambda_client = boto3.client('lambda', region_name=self.region, config=client_config)
+        iam_client = boto3.client('iam', config=client_config)
+        
+        self.logger.info(f"Searching for resources tagged {DEMO_TAG['Key']}={DEMO_TAG['Value']}")
+        functions, roles = self.find_demo_resources(lambda_client, iam_client, workers,
+                                                    include_untagged_roles=include_untagged_roles)
+        self.logger.info(f"Found {len(functions)} functions and {len(roles)} roles")
+        
+        if dry_run:
+            for name in functions:
+                self.logger.info(f"  [dry run] function: {name}")
+            for name in roles:
+                self.logger.info(f"  [dry run] role: {name}")
+            return {'functions': functions, 'roles': roles, 'deleted': 0, 'failed': {}}
+        
+        def delete_function(name):
+            call_with_retries(lambda_client.delete_function, max_retries, FunctionName=name)
+        
+        def delete_role(name):
+            self.delete_role_and_policies(iam_client, name, max_retries)
+        
+        started = time.monotonic()
+        failed = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(delete_function, name): name for name in functions}
+            futures.update({executor.submit(delete_role, name): name for name in roles})
+            for future, name in futures.items():
+                try:
+                    future.result()
+                except ClientError as e:
+                    failed[name] = e.response['Error']['Code']
+                    self.logger.warning(f"Could not delete {name}: {e}")
+        
+        deleted = len(futures) - len(failed)
+        self.logger.info(f"Deleted {deleted} resources in {time.monotonic() - started:.1f}s, {len(failed)} failed")
+        return {'functions': functions, 'roles': roles, 'deleted': deleted, 'failed': failed}
+
+def run_sweep(args):
+    """Delete all tagged demo resources left behind by earlier runs"""
+    lambda_automation = LambdaAutomation(region=args.region)
+    
+    print("\n=== Sweeping Demo Lambda Resources ===")
+    result = lambda_automation.sweep_demo_resources(dry_run=args.dry_run, workers=args.workers,
+                                                    include_untagged_roles=not args.tagged_only)
+    return 1 if result['failed'] else 0
+
+def run_load_test(args):
+    """Load test an existing Lambda function"""
+    lambda_automation = LambdaAutomation(region=args.region, function_name=args.function_name)
+    event = json.loads(args.event) if args.event else None
+    
+    print(f"\n=== Load Testing {args.function_name} ===")
+    report = lambda_automation.load_test_lambda_function(
+        event=event,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        rate=args.rate,
+        qualifier=args.qualifier
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+def run_power_tuning(args):
+    """Sweep memory sizes for an existing Lambda function"""
+    lambda_automation = LambdaAutomation(region=args.region, function_name=args.function_name)
+    event = json.loads(args.event) if args.event else None
+    
+    print(f"\n=== Power Tuning {args.function_name} ===")
+    result = lambda_automation.power_tune_lambda_function(
+        memory_sizes=[int(m) for m in args.memory_sizes.split(',')],
+        event=event,
+        invocations=args.invocations,
+        concurrency=args.concurrency,
+        latency_target_ms=args.latency_target,
+        latency_percentile=args.percentile,
+        keep_versions=args.keep_versions
+    )
+    if result['recommendation']:
+        print(f"Recommended memory size: {result['recommendation']['memory_size_mb']} MB")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+def run_publish(args):
+    """Publish a version and point an alias at it"""
+    lambda_automation = LambdaAutomation(region=args.region, function_name=args.function_name)
+    version = args.version or lambda_automation.publish_version(args.description)
+    lambda_automation.point_alias(args.alias, version)
+    return 0
+
+def validate_provision_args(parser, args):
+    """Reject provision argument combinations that would be ignored or half-applied"""
+    if bool(args.scale_up_cron) != bool(args.scale_down_cron):
+        parser.error('--scale-up-cron and --scale-down-cron must be given together')
+    if args.concurrency is not None and args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    if args.min_capacity < 0:
+        parser.error('--min-capacity cannot be negative')
+    if args.scale_up_cron:
+        if args.concurrency is None:
+            parser.error('a schedule needs --concurrency as the scaled-up capacity')
+        if args.min_capacity > args.concurrency:
+            parser.error('--min-capacity cannot exceed --concurrency')
+    if args.remove and (args.concurrency is not None or args.scale_up_cron or args.compare):
+        parser.error('--remove cannot be combined with other provision options')
+    if not (args.remove or args.concurrency is not None or args.compare):
+        parser.error('nothing to do: give --concurrency, --remove or --compare')
+
+def run_provision(args):
+    """Configure, schedule, remove or evaluate provisioned concurrency on an alias"""
+    lambda_automation = LambdaAutomation(region=args.region, function_name=args.function_name)
+    
+    if args.remove:
+        lambda_automation.remove_provisioned_concurrency(args.alias)
+        return 0
+    if args.scale_up_cron and args.scale_down_cron:
+        lambda_automation.schedule_provisioned_concurrency(
+            args.alias, args.min_capacity, args.concurrency,
+            args.scale_up_cron, args.scale_down_cron, args.timezone
+        )
+    elif args.concurrency:
+        lambda_automation.set_provisioned_concurrency(args.alias, args.concurrency)
+    
+    if args.compare:
+        event = json.loads(args.event) if args.event else None
+        comparison = lambda_automation.compare_provisioned_concurrency(
+            args.alias, baseline_qualifier=args.baseline, event=event,
+            concurrency=args.load_concurrency, duration=args.duration
+        )
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(comparison, f, indent=2)
+            print(f"Report written to {args.output}")
+    return 0
+
+def run_monitor(args):
+    """Monitor an existing Lambda function"""
+    lambda_automation = LambdaAutomation(region=args.region, function_name=args.function_name)
+    lambda_automation.monitor_lambda_function(
+        follow=args.follow,
+        poll_interval=args.interval,
+        windows=[int(w) for w in args.windows.split(',')],
+        duration=args.duration,
+        checkpoint_file=args.checkpoint_file
+    )
+    return 0
+
 def main():
     """Main demonstration function"""
+    parser = argparse.ArgumentParser(
+        description='AWS Lambda automation demonstration',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                                          # Run the full demonstration
+  %(prog)s load-test -f my-function -c 20 -d 60
+  %(prog)s load-test -f my-function --rate 50 --event '{"action": "health_check"}'
+  %(prog)s monitor -f my-function --follow --windows 60,300
+  %(prog)s tune -f my-function --latency-target 200
+  %(prog)s sweep --dry-run
+  %(prog)s publish -f my-function --alias live
+  %(prog)s provision -f my-function --alias live --concurrency 5 --compare
+        """
+    )
+    parser.add_argument('--region', '-r', default='us-east-1',
+                       help='AWS region (default: us-east-1)')
+    subparsers = parser.add_subparsers(dest='command')
+    
+    load_test = subparsers.add_parser('load-test', help='Invoke a function under load and report latency')
+    load_test.add_argument('--function-name', '-f', required=True,
+                           help='Function to load test')
+    load_test.add_argument('--qualifier', '-q',
+                           help='Version or alias to invoke (default: $LATEST)')
+    load_test.add_argument('--concurrency', '-c', type=int, default=10,
+                           help='Concurrent invocations (default: 10)')
+    load_test.add_argument('--rate', type=float,
+                           help='Target invocations per second instead of closed-loop concurrency')
+    load_test.add_argument('--duration', '-d', type=int, default=30,
+                           help='Test duration in seconds (default: 30)')
+    load_test.add_argument('--event', help='JSON event payload (default: health_check)')
+    load_test.add_argument('--output', '-o', help='Write the JSON report to this file')
+    
+    monitor = subparsers.add_parser('monitor', help='Show recent logs or follow REPORT line metrics')
+    monitor.add_argument('--function-name', '-f', required=True,
+                         help='Function to monitor')
+    monitor.add_argument('--follow', action='store_true',
+                         help='Keep polling all log streams and aggregate metrics')
+    monitor.add_argument('--interval', type=int, default=5,
+                         help='Seconds between polls in follow mode (default: 5)')
+    monitor.add_argument('--windows', default='60,300',
+                         help='Comma-separated rolling windows in seconds (default: 60,300)')
+    monitor.add_argument('--duration', '-d', type=int,
+                         help='Stop following after this many seconds')
+    monitor.add_argument('--checkpoint-file',
+                         help='Persist the start time so a restarted follow resumes without gaps')
+    
+    tune = subparsers.add_parser('tune', help='Find the cheapest memory size that meets a latency target')
+    tune.add_argument('--function-name', '-f', required=True,
+                      help='Function to tune')
+    tune.add_argument('--memory-sizes', default=','.join(str(m) for m in DEFAULT_TUNING_MEMORY_SIZES),
+                      help='Comma-separated memory sizes in MB (default: 128 to 3008)')
+    tune.add_argument('--invocations', '-n', type=int, default=50,
+                      help='Invocations per memory size (default: 50)')
+    tune.add_argument('--concurrency', '-c', type=int, default=5,
+                      help='Concurrent invocations per memory size (default: 5)')
+    tune.add_argument('--latency-target', type=float,
+                      help='Maximum acceptable duration in ms')
+    tune.add_argument('--percentile', default='p90', choices=['p50', 'p90', 'p99'],
+                      help='Duration percentile compared with the target (default: p90)')
+    tune.add_argument('--event', help='JSON event payload (default: health_check)')
+    tune.add_argument('--keep-versions', action='store_true',
+                      help='Keep the published versions and tune-<MB> aliases')
+    tune.add_argument('--output', '-o', help='Write the JSON report to this file')
+    
+    sweep = subparsers.add_parser('sweep', help='Delete all demo functions and roles tagged CreatedBy=LambdaAutomation')
+    sweep.add_argument('--dry-run', action='store_true',
+                       help='List matching resources without deleting them')
+    sweep.add_argument('--workers', '-w', type=int, default=10,
+                       help='Parallel delete workers (default: 10)')
+    sweep.add_argument('--tagged-only', action='store_true',
+                       help='Skip untagged demo-lambda-role-<timestamp> roles left by older runs')
+    
+    publish = subparsers.add_parser('publish', help='Publish a version and point an alias at it')
+    publish.add_argument('--function-name', '-f', required=True,
+                         help='Function to publish')
+    publish.add_argument('--alias', '-a', default='live',
+                         help='Alias to create or move (default: live)')
+    publish.add_argument('--version',
+                         help='Point the alias at an existing version instead of publishing')
+    publish.add_argument('--description', help='Version description')
+    
+    provision = subparsers.add_parser('provision', help='Manage provisioned concurrency on an alias')
+    provision.add_argument('--function-name', '-f', required=True,
+                           help='Function to configure')
+    provision.add_argument('--alias', '-a', default='live',
+                           help='Alias to configure (default: live)')
+    provision.add_argument('--concurrency', '-c', type=int,
+                           help='Provisioned concurrent executions (maximum when scheduled)')
+    provision.add_argument('--min-capacity', type=int, default=0,
+                           help='Provisioned concurrency outside the scheduled window (default: 0)')
+    provision.add_argument('--scale-up-cron',
+                           help='Application Auto Scaling cron expression, e.g. "0 8 ? * MON-FRI *"')
+    provision.add_argument('--scale-down-cron',
+                           help='Cron expression for returning to --min-capacity')
+    provision.add_argument('--timezone', default='UTC',
+                           help='Timezone for the schedule (default: UTC)')
+    provision.add_argument('--remove', action='store_true',
+                           help='Remove provisioned concurrency and any schedule')
+    provision.add_argument('--compare', action='store_true',
+                           help='Load test the alias against an unprovisioned baseline')
+    provision.add_argument('--baseline', default='$LATEST',
+                           help='Unprovisioned qualifier to compare with (default: $LATEST)')
+    provision.add_argument('--load-concurrency', type=int, default=10,
+                           help='Concurrent invocations during the comparison (default: 10)')
+    provision.add_argument('--duration', '-d', type=int, default=30,
+                           help='Seconds per comparison load test (default: 30)')
+    provision.add_argument('--event', help='JSON event payload (default: health_check)')
+    provision.add_argument('--output', '-o', help='Write the JSON comparison to this file')
+    
+    args = parser.parse_args()
+    if args.command == 'provision':
+        validate_provision_args(parser, args)
+    
     try:
+        if args.command == 'load-test':
+            return run_load_test(args)
+        if args.command == 'monitor':
+            return run_monitor(args)
+        if args.command == 'tune':
+            return run_power_tuning(args)
+        if args.command == 'sweep':
+            return run_sweep(args)
+        if args.command == 'publish':
+            return run_publish(args)
+        if args.command == 'provision':
+            return run_provision(args)
+        
         # Initialize automation
-        lambda_automation = LambdaAutomation()
+        lambda_automation = LambdaAutomation(region=args.region)
         
         print("\n=== AWS Lambda Automation Demonstration ===")
         
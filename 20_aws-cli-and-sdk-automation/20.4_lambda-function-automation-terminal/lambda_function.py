@@ -1,16 +1,182 @@
+import time
+_MODULE_INIT_START = time.perf_counter()
+
+import base64
+import gzip
 import json
-import boto3
 import os
 import logging
+import random
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from urllib.parse import unquote_plus
+
+# Use orjson (for example from a Lambda layer) when it is installed, else the standard library
+try:
+    import orjson
+    
+    def encode_json_bytes(obj):
+        return orjson.dumps(obj, default=str)
+    
+    JSON_BACKEND = 'orjson'
+except ImportError:
+    def encode_json_bytes(obj):
+        return json.dumps(obj, separators=(',', ':'), default=str).encode('utf-8')
+    
+    JSON_BACKEND = 'json'
+
+def encode_json(obj):
+    """Serialize a response body with the fastest available JSON backend"""
+    return encode_json_bytes(obj).decode('utf-8')
+
+# API Gateway bodies at least this large are gzip-compressed for clients that accept it
+GZIP_MIN_BYTES = int(os.environ.get('GZIP_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '5'))
+
+# Fraction of invocations whose full event payload is logged (0.0 - 1.0)
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '0.01'))
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'LambdaAutomationDemo')
+
+# Upper bound on concurrent S3 requests per invocation (also the client connection pool size)
+S3_MAX_WORKERS = int(os.environ.get('S3_MAX_WORKERS', '16'))
+
+# process_data settings: items are transformed in batches of BATCH_SIZE, and results
+# larger than INLINE_RESULT_BYTES are streamed to RESULTS_BUCKET as NDJSON instead of
+# being returned in the response (Lambda caps synchronous responses at 6 MB)
+BATCH_SIZE = int(os.environ.get('BATCH_SIZE', '5000'))
+INLINE_RESULT_BYTES = int(os.environ.get('INLINE_RESULT_BYTES', str(1024 * 1024)))
+RESULTS_BUCKET = os.environ.get('RESULTS_BUCKET')
+MULTIPART_PART_BYTES = 8 * 1024 * 1024  # S3 requires at least 5 MB for all but the last part
+
+# health_check settings: results are cached in the warm container for HEALTH_CACHE_TTL
+# seconds, and each dependency probe is abandoned after HEALTH_PROBE_TIMEOUT seconds
+HEALTH_CACHE_TTL = float(os.environ.get('HEALTH_CACHE_TTL', '30'))
+HEALTH_PROBE_TIMEOUT = float(os.environ.get('HEALTH_PROBE_TIMEOUT', '2'))
+HEALTH_CHECK_BUCKET = os.environ.get('HEALTH_CHECK_BUCKET')
+# DynamoDB is only probed when a table is configured (needs dynamodb:DescribeTable on it)
+HEALTH_CHECK_TABLE = os.environ.get('HEALTH_CHECK_TABLE')
+
+# Per-invocation state: request ID, sampling decision and metric counters
+_invocation = {'request_id': None, 'sampled': False, 'route': 'unknown', 'metrics': {}}
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as single-line JSON with the current request ID"""
+    
+    def format(self, record):
+        entry = {
+            'level': record.levelname,
+            'message': record.getMessage(),
+            'request_id': _invocation['request_id']
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
 
 # Configure logging
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+if not logger.handlers:
+    logger.addHandler(logging.StreamHandler(sys.stdout))
+for handler in logger.handlers:
+    handler.setFormatter(JsonFormatter())
+
+# Init phase timing breakdown, logged once per container on the first invocation
+INIT_TIMINGS = {
+    'imports_ms': round((time.perf_counter() - _MODULE_INIT_START) * 1000, 2),
+    'json_backend': JSON_BACKEND
+}
+_init_logged = False
+
+# AWS clients are created on first use (not at import) and reused across warm invocations.
+# boto3 itself is imported lazily too, since importing it is a large part of init time.
+_aws_clients = {}
+_aws_clients_lock = threading.Lock()
+
+def _get_or_create(key, factory):
+    """Return a memoized client, building it under a lock the first time"""
+    client = _aws_clients.get(key)
+    if client is None:
+        with _aws_clients_lock:
+            client = _aws_clients.get(key)
+            if client is None:
+                start = time.perf_counter()
+                client = factory()
+                _aws_clients[key] = client
+                elapsed = round((time.perf_counter() - start) * 1000, 2)
+                logger.info("Created AWS client", extra={'fields': {'client': key, 'elapsed_ms': elapsed}})
+    return client
+
+def get_s3_client():
+    """S3 client, created on first use and shared by all worker threads"""
+    def factory():
+        import boto3
+        from botocore.config import Config
+        return boto3.client('s3', config=Config(max_pool_connections=S3_MAX_WORKERS))
+    return _get_or_create('s3_client', factory)
+
+def get_dynamodb_resource():
+    """DynamoDB resource, created on first use"""
+    def factory():
+        import boto3
+        return boto3.resource('dynamodb')
+    return _get_or_create('dynamodb_resource', factory)
+
+def start_invocation(context):
+    """Reset per-invocation logging state and decide whether to sample verbose logs"""
+    _invocation['request_id'] = context.aws_request_id
+    _invocation['sampled'] = logger.isEnabledFor(logging.DEBUG) or random.random() < LOG_SAMPLE_RATE
+    _invocation['route'] = 'unknown'
+    _invocation['metrics'] = {'Invocations': 1, 'ColdStart': 0 if _init_logged else 1}
+
+def is_sampled():
+    """True when verbose payload logs should be written for this invocation"""
+    return _invocation['sampled']
+
+def add_metric(name, value=1):
+    """Increment a per-invocation counter emitted in Embedded Metric Format"""
+    _invocation['metrics'][name] = _invocation['metrics'].get(name, 0) + value
+
+def flush_metrics(context):
+    """Write the invocation's counters as one CloudWatch Embedded Metric Format line"""
+    metrics = _invocation['metrics']
+    document = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [['FunctionName', 'Route']],
+                'Metrics': [{'Name': name, 'Unit': 'Count'} for name in metrics]
+            }]
+        },
+        'FunctionName': context.function_name,
+        'Route': _invocation['route'],
+        'RequestId': _invocation['request_id']
+    }
+    document.update(metrics)
+    # EMF lines go straight to stdout so CloudWatch extracts them without the log formatter
+    print(json.dumps(document))
 
-# Initialize AWS clients outside handler for reuse
-s3_client = boto3.client('s3')
-dynamodb = boto3.resource('dynamodb')
+def get_probe_client(service):
+    """Client for health probes with tight timeouts and no retries, created on first use"""
+    def factory():
+        import boto3
+        from botocore.config import Config
+        return boto3.client(service, config=Config(
+            connect_timeout=HEALTH_PROBE_TIMEOUT,
+            read_timeout=HEALTH_PROBE_TIMEOUT,
+            retries={'max_attempts': 1}
+        ))
+    return _get_or_create(f'{service}_probe_client', factory)
+
+def log_init_timings():
+    """Log the init phase breakdown on the first invocation in this container"""
+    global _init_logged
+    if not _init_logged:
+        _init_logged = True
+        logger.info("Init timings", extra={'fields': INIT_TIMINGS})
 
 def lambda_handler(event, context):
     """
@@ -18,63 +184,103 @@ def lambda_handler(event, context):
     Demonstrates common Lambda patterns and AWS service integration
     """
     
+    start_invocation(context)
     try:
-        logger.info(f"Received event: {json.dumps(event)}")
-        
-        # Get function metadata
-        function_name = context.function_name
-        function_version = context.function_version
-        request_id = context.aws_request_id
+        log_init_timings()
+        if is_sampled():
+            logger.info("Received event", extra={'fields': {'event': event}})
         
         # Process different event types
         if 'source' in event and event['source'] == 'aws.s3':
+            _invocation['route'] = 's3'
             return handle_s3_event(event, context)
         elif 'httpMethod' in event:
+            _invocation['route'] = 'api_gateway'
             return handle_api_gateway_event(event, context)
         else:
+            _invocation['route'] = 'direct'
             return handle_direct_invocation(event, context)
             
     except Exception as e:
-        logger.error(f"Error processing event: {str(e)}")
+        add_metric('Errors')
+        logger.exception("Error processing event", extra={'fields': {'error': str(e)}})
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': encode_json({
                 'error': str(e),
                 'requestId': context.aws_request_id
             })
         }
+    finally:
+        flush_metrics(context)
 
 def handle_s3_event(event, context):
-    """Handle S3 bucket events"""
-    logger.info("Processing S3 event")
+    """
+    Handle S3 bucket events
     
+    Records are enriched with HeadObject through a bounded thread pool. Failures are
+    reported per record instead of raised, so one bad object does not cause the whole
+    batch to be retried.
+    """
+    records = event.get('Records', [])
     processed_objects = []
-    for record in event.get('Records', []):
-        bucket = record['s3']['bucket']['name']
-        key = record['s3']['object']['key']
-        event_name = record['eventName']
-        
-        processed_objects.append({
-            'bucket': bucket,
-            'key': key,
-            'event': event_name,
-            'processed_at': datetime.utcnow().isoformat()
-        })
-        
-        logger.info(f"Processed S3 object: {bucket}/{key}")
+    failed_objects = []
+    
+    if records:
+        workers = min(S3_MAX_WORKERS, len(records))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(process_s3_record, records):
+                if result['status'] == 'succeeded':
+                    processed_objects.append(result)
+                else:
+                    failed_objects.append(result)
+    
+    add_metric('S3RecordsProcessed', len(processed_objects))
+    add_metric('S3RecordsFailed', len(failed_objects))
+    logger.info("Processed S3 event", extra={'fields': {
+        'records': len(records),
+        'succeeded': len(processed_objects),
+        'failed': len(failed_objects)
+    }})
+    if failed_objects:
+        logger.warning("S3 records failed", extra={'fields': {'failures': failed_objects}})
+    if is_sampled():
+        logger.info("S3 objects", extra={'fields': {'objects': processed_objects}})
     
     return {
         'statusCode': 200,
-        'body': json.dumps({
-            'message': 'S3 event processed successfully',
-            'processed_objects': processed_objects
+        'body': encode_json({
+            'message': 'S3 event processed successfully' if not failed_objects
+                       else 'S3 event processed with failures',
+            'processed_objects': processed_objects,
+            'failed_objects': failed_objects
         })
     }
 
+def process_s3_record(record):
+    """Look up one S3 notification record and return its success or failure"""
+    result = {'status': 'failed'}
+    try:
+        bucket = record['s3']['bucket']['name']
+        # Keys arrive URL-encoded in S3 event notifications
+        key = unquote_plus(record['s3']['object']['key'])
+        result.update({'bucket': bucket, 'key': key, 'event': record.get('eventName')})
+        
+        head = get_s3_client().head_object(Bucket=bucket, Key=key)
+        result.update({
+            'status': 'succeeded',
+            'size': head['ContentLength'],
+            'content_type': head.get('ContentType'),
+            'etag': head.get('ETag', '').strip('"'),
+            'last_modified': head['LastModified'].isoformat(),
+            'processed_at': datetime.utcnow().isoformat()
+        })
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
 def handle_api_gateway_event(event, context):
     """Handle API Gateway events"""
-    logger.info("Processing API Gateway event")
-    
     method = event['httpMethod']
     path = event['path']
     query_params = event.get('queryStringParameters', {})
@@ -88,24 +294,81 @@ def handle_api_gateway_event(event, context):
         'function_name': context.function_name
     }
     
+    return build_api_response(event, 200, response_body)
+
+def accept_encoding_values(event):
+    """Accept-Encoding header values, from headers or else multiValueHeaders"""
+    for field in ('headers', 'multiValueHeaders'):
+        for name, value in (event.get(field) or {}).items():
+            if name.lower() == 'accept-encoding' and value:
+                return [value] if isinstance(value, str) else list(value)
+    return []
+
+def accepts_gzip(event):
+    """
+    True if the request's Accept-Encoding header allows gzip
+    
+    An explicit gzip entry decides; otherwise '*' does. Either one only
+    counts with a q value above 0, so 'gzip;q=0' refuses gzip.
+    """
+    qualities = {}
+    for value in accept_encoding_values(event):
+        for entry in value.split(','):
+            coding, *params = [part.strip() for part in entry.split(';')]
+            quality = 1.0
+            for param in params:
+                name, _, number = param.partition('=')
+                if name.strip().lower() == 'q':
+                    try:
+                        quality = float(number)
+                    except ValueError:
+                        quality = 0.0
+            if coding:
+                qualities[coding.lower()] = quality
+    quality = qualities.get('gzip', qualities.get('*', 0.0))
+    return quality > 0
+
+def build_api_response(event, status_code, body):
+    """
+    Encode an API Gateway proxy response
+    
+    Bodies of at least GZIP_MIN_BYTES are gzip-compressed and base64 encoded when the
+    client sends Accept-Encoding: gzip; smaller bodies are not worth the CPU.
+    """
+    encoded = encode_json_bytes(body)
+    headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Vary': 'Accept-Encoding'
+    }
+    
+    if len(encoded) >= GZIP_MIN_BYTES and accepts_gzip(event):
+        compressed = gzip.compress(encoded, compresslevel=GZIP_LEVEL)
+        add_metric('ResponseBytesSaved', len(encoded) - len(compressed))
+        headers['Content-Encoding'] = 'gzip'
+        return {
+            'statusCode': status_code,
+            'headers': headers,
+            'body': base64.b64encode(compressed).decode('ascii'),
+            'isBase64Encoded': True
+        }
+    
     return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps(response_body)
+        'statusCode': status_code,
+        'headers': headers,
+        'body': encoded.decode('utf-8'),
+        'isBase64Encoded': False
     }
 
 def handle_direct_invocation(event, context):
     """Handle direct Lambda invocations"""
-    logger.info("Processing direct invocation")
-    
     # Extract data from event
     action = event.get('action', 'default')
     data = event.get('data', {})
     
     # Perform action based on event
+    # Unknown actions share one route so the metric dimension stays low-cardinality
+    _invocation['route'] = action if action in ('process_data', 'health_check') else 'direct'
     if action == 'process_data':
         result = process_business_logic(data)
     elif action == 'health_check':
@@ -118,7 +381,7 @@ def handle_direct_invocation(event, context):
     
     return {
         'statusCode': 200,
-        'body': json.dumps({
+        'body': encode_json({
             'action': action,
             'result': result,
             'execution_time': context.get_remaining_time_in_millis(),
@@ -127,36 +390,199 @@ def handle_direct_invocation(event, context):
         })
     }
 
-def process_business_logic(data):
-    """Simulate business logic processing"""
-    logger.info("Processing business logic")
+class NdjsonResultWriter:
+    """
+    Collect results inline until they pass a size threshold, then stream them to S3
     
-    # Simulate data processing
-    processed_items = []
-    for item in data.get('items', []):
-        processed_items.append({
+    Once the threshold is crossed the buffered records are sent as the first part of a
+    multipart upload, and only one part's worth of bytes is held in memory after that.
+    Without a bucket there is nowhere to stream to, so no NDJSON is buffered at all and
+    the encoded size is only counted until it passes the threshold.
+    """
+    
+    def __init__(self, bucket, key, inline_limit=INLINE_RESULT_BYTES):
+        self.bucket = bucket
+        self.key = key
+        self.inline_limit = inline_limit
+        self.inline_records = []
+        self.buffer = bytearray()
+        self.inline_bytes = 0
+        self.bytes_written = 0
+        self.upload_id = None
+        self.parts = []
+    
+    def write(self, records):
+        if not self.bucket:
+            self.inline_records.extend(records)
+            # Sizes only matter up to the threshold, so counting stops once it is passed
+            for record in records:
+                if self.inline_bytes > self.inline_limit:
+                    break
+                self.inline_bytes += len(encode_json_bytes(record)) + 1
+            return
+        for record in records:
+            self.buffer += encode_json_bytes(record) + b'\n'
+        if self.upload_id is None:
+            self.inline_records.extend(records)
+            if len(self.buffer) > self.inline_limit:
+                self.inline_records = None
+                self.upload_id = get_s3_client().create_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, ContentType='application/x-ndjson'
+                )['UploadId']
+        if self.upload_id is not None and len(self.buffer) >= MULTIPART_PART_BYTES:
+            self._upload_part()
+    
+    def _upload_part(self):
+        part_number = len(self.parts) + 1
+        response = get_s3_client().upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            PartNumber=part_number, Body=bytes(self.buffer)
+        )
+        self.parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+        self.bytes_written += len(self.buffer)
+        self.buffer = bytearray()
+    
+    def close(self):
+        """Finish the upload and return a pointer, or None if results stayed inline"""
+        if self.upload_id is None:
+            return None
+        if self.buffer:
+            self._upload_part()
+        get_s3_client().complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={'Parts': self.parts}
+        )
+        return {'bucket': self.bucket, 'key': self.key, 'format': 'ndjson', 'bytes': self.bytes_written}
+    
+    def abort(self):
+        if self.upload_id is not None:
+            get_s3_client().abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+
+def transform_batch(items, timestamp):
+    """Transform one batch of items, sharing a single timestamp"""
+    return [
+        {
             'original': item,
             'processed': item.upper() if isinstance(item, str) else str(item),
-            'timestamp': datetime.utcnow().isoformat()
-        })
+            'timestamp': timestamp
+        }
+        for item in items
+    ]
+
+def process_business_logic(data):
+    """Simulate business logic processing"""
+    items = data.get('items', [])
+    writer = NdjsonResultWriter(RESULTS_BUCKET, f"results/{_invocation['request_id']}.ndjson")
+    
+    try:
+        for start in range(0, len(items), BATCH_SIZE):
+            batch = items[start:start + BATCH_SIZE]
+            writer.write(transform_batch(batch, datetime.utcnow().isoformat()))
+        location = writer.close()
+    except Exception:
+        writer.abort()
+        raise
     
+    add_metric('ItemsProcessed', len(items))
+    if location:
+        logger.info("Results streamed to S3", extra={'fields': location})
+        return {
+            'processed_count': len(items),
+            'result_location': location
+        }
+    if writer.inline_bytes > writer.inline_limit:
+        logger.warning("Large result returned inline, set RESULTS_BUCKET to stream it to S3")
     return {
-        'processed_count': len(processed_items),
-        'processed_items': processed_items
+        'processed_count': len(items),
+        'processed_items': writer.inline_records
     }
 
+_health_cache = {'result': None, 'expires': 0.0}
+_health_cache_lock = threading.Lock()
+
+def probe_s3(client):
+    """Check S3 reachability with one lightweight request"""
+    if HEALTH_CHECK_BUCKET:
+        client.head_bucket(Bucket=HEALTH_CHECK_BUCKET)
+    else:
+        client.list_buckets()
+
+def probe_dynamodb(client):
+    """Check DynamoDB reachability by describing the configured table"""
+    client.describe_table(TableName=HEALTH_CHECK_TABLE)
+
+# Probe name -> (service whose probe client is passed in, probe function)
+HEALTH_PROBES = {'s3': ('s3', probe_s3)}
+if HEALTH_CHECK_TABLE:
+    HEALTH_PROBES['dynamodb'] = ('dynamodb', probe_dynamodb)
+
+def run_probe(probe, client):
+    """
+    Run one probe and classify the outcome
+    
+    An API error (for example AccessDenied) still proves the service answered, so it is
+    reported as degraded. Connection failures and timeouts are reported as unavailable.
+    """
+    start = time.perf_counter()
+    try:
+        probe(client)
+        status, error = 'available', None
+    except Exception as e:
+        response = getattr(e, 'response', None)
+        if response and 'Error' in response:
+            status, error = 'degraded', response['Error'].get('Code')
+        else:
+            status, error = 'unavailable', str(e)
+    result = {'status': status, 'latency_ms': round((time.perf_counter() - start) * 1000, 2)}
+    if error:
+        result['error'] = error
+    return result
+
 def perform_health_check():
-    """Perform system health check"""
-    logger.info("Performing health check")
+    """Perform system health check, reusing a cached result while it is fresh"""
+    with _health_cache_lock:
+        now = time.monotonic()
+        if _health_cache['result'] is None or now >= _health_cache['expires']:
+            _health_cache['result'] = run_health_probes()
+            _health_cache['expires'] = now + HEALTH_CACHE_TTL
+            cached = False
+        else:
+            cached = True
+        result = dict(_health_cache['result'])
     
-    health_status = {
-        'status': 'healthy',
-        'timestamp': datetime.utcnow().isoformat(),
-        'checks': {
-            's3_client': 'available',
-            'dynamodb_client': 'available',
-            'memory_usage': 'normal'
-        }
+    add_metric('HealthCheckCacheHits' if cached else 'HealthCheckProbes')
+    result['cached'] = cached
+    return result
+
+def run_health_probes():
+    """Probe every dependency in parallel, each bounded by HEALTH_PROBE_TIMEOUT"""
+    # Clients (and the boto3 import on a cold container) are built before the clock
+    # starts, so only the probe requests themselves count against the timeout
+    clients = {name: get_probe_client(service) for name, (service, _) in HEALTH_PROBES.items()}
+    
+    executor = ThreadPoolExecutor(max_workers=len(HEALTH_PROBES))
+    futures = {
+        name: executor.submit(run_probe, probe, clients[name])
+        for name, (_, probe) in HEALTH_PROBES.items()
     }
+    done, _ = wait(futures.values(), timeout=HEALTH_PROBE_TIMEOUT)
     
-    return health_status
+    checks = {}
+    for name, future in futures.items():
+        if future in done:
+            checks[name] = future.result()
+        else:
+            checks[name] = {'status': 'unavailable', 'error': 'timeout',
+                            'latency_ms': HEALTH_PROBE_TIMEOUT * 1000}
+    # Do not wait for probes that overran; they finish in the background
+    executor.shutdown(wait=False)
+    
+    healthy = all(check['status'] == 'available' for check in checks.values())
+    return {
+        'status': 'healthy' if healthy else 'degraded',
+        'timestamp': datetime.utcnow().isoformat(),
+        'checks': checks
+    }
+
+# Recorded last so it covers everything evaluated at import time
+INIT_TIMINGS['module_init_ms'] = round((time.perf_counter() - _MODULE_INIT_START) * 1000, 2)
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Local Lambda Invocation Benchmark
+Replays test events through lambda_function.lambda_handler without deploying,
+measuring cold init time, per-route warm latency and memory allocations
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+class FakeContext:
+    """Stand-in for the Lambda context object with a real countdown"""
+    
+    def __init__(self, function_name='local-benchmark', memory_limit_in_mb=128, timeout=30):
+        self.function_name = function_name
+        self.function_version = '$LATEST'
+        self.invoked_function_arn = f'arn:aws:lambda:us-east-1:123456789012:function:{function_name}'
+        self.memory_limit_in_mb = memory_limit_in_mb
+        self.aws_request_id = str(uuid.uuid4())
+        self.log_group_name = f'/aws/lambda/{function_name}'
+        self.log_stream_name = datetime.now().strftime('%Y/%m/%d/[$LATEST]') + uuid.uuid4().hex
+        self._deadline = time.monotonic() + timeout
+    
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+class StubS3Client:
+    """Offline S3 client covering the calls the handler makes"""
+    
+    def __init__(self, latency_ms=0):
+        self.latency = latency_ms / 1000.0
+    
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+    
+    def head_object(self, Bucket, Key):
+        self._wait()
+        return {
+            'ContentLength': 1024,
+            'ContentType': 'application/octet-stream',
+            'ETag': '"d41d8cd98f00b204e9800998ecf8427e"',
+            'LastModified': datetime(2024, 1, 1, tzinfo=timezone.utc)
+        }
+    
+    def head_bucket(self, Bucket):
+        self._wait()
+        return {}
+    
+    def list_buckets(self):
+        self._wait()
+        return {'Buckets': []}
+    
+    def create_multipart_upload(self, **kwargs):
+        self._wait()
+        return {'UploadId': uuid.uuid4().hex}
+    
+    def upload_part(self, PartNumber, **kwargs):
+        self._wait()
+        return {'ETag': f'"part-{PartNumber}"'}
+    
+    def complete_multipart_upload(self, **kwargs):
+        self._wait()
+        return {}
+    
+    def abort_multipart_upload(self, **kwargs):
+        return {}
+
+class StubDynamoDBClient:
+    """Offline DynamoDB client covering the calls the handler makes"""
+    
+    def __init__(self, latency_ms=0):
+        self.latency = latency_ms / 1000.0
+    
+    def describe_table(self, TableName):
+        if self.latency:
+            time.sleep(self.latency)
+        return {'Table': {'TableName': TableName, 'TableStatus': 'ACTIVE'}}
+
+def load_handler_module(aws_latency_ms=0):
+    """Import lambda_function with stub AWS clients in place of boto3"""
+    sys.path.insert(0, HERE)
+    start = time.perf_counter()
+    import lambda_function
+    import_ms = (time.perf_counter() - start) * 1000
+    
+    # The handler builds clients lazily through this cache, so pre-filling it keeps
+    # every code path offline and boto3 is never imported
+    s3 = StubS3Client(aws_latency_ms)
+    dynamodb = StubDynamoDBClient(aws_latency_ms)
+    lambda_function._aws_clients.update({
+        's3_client': s3,
+        's3_probe_client': s3,
+        'dynamodb_probe_client': dynamodb,
+        'dynamodb_resource': dynamodb
+    })
+    logging.getLogger().setLevel(logging.CRITICAL)
+    return lambda_function, import_ms
+
+def invoke(module, event):
+    """Invoke the handler once, discarding its stdout (EMF lines)"""
+    devnull = open(os.devnull, 'w')
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        start = time.perf_counter()
+        module.lambda_handler(event, FakeContext())
+        return (time.perf_counter() - start) * 1000
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100.0 * len(ordered))) - 1]
+
+def summarize(values):
+    return {
+        'p50': round(percentile(values, 50), 3),
+        'p90': round(percentile(values, 90), 3),
+        'p99': round(percentile(values, 99), 3),
+        'max': round(max(values), 3),
+        'mean': round(sum(values) / len(values), 3)
+    }
+
+def cold_worker(route, events_file, aws_latency_ms):
+    """Run in a fresh interpreter: import the handler and invoke it once"""
+    events = load_events(events_file)
+    module, import_ms = load_handler_module(aws_latency_ms)
+    first_invoke_ms = invoke(module, events[route])
+    print(json.dumps({'import_ms': import_ms, 'first_invoke_ms': first_invoke_ms}))
+
+def measure_cold(route, iterations, events_file, aws_latency_ms):
+    """Measure init and first invocation in fresh interpreters, like a new container"""
+    import_times, first_times = [], []
+    for _ in range(iterations):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--cold-worker', route,
+             '--events', events_file, '--aws-latency-ms', str(aws_latency_ms)],
+            check=True, capture_output=True, text=True, env=os.environ.copy()
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        import_times.append(result['import_ms'])
+        first_times.append(result['first_invoke_ms'])
+    return {'init_ms': summarize(import_times), 'first_invoke_ms': summarize(first_times)}
+
+def measure_warm(module, event, iterations):
+    """Measure repeated invocations in one already-initialized module"""
+    invoke(module, event)  # make sure lazy state is built before timing
+    latencies = [invoke(module, event) for _ in range(iterations)]
+    
+    # Allocations are measured in a separate, shorter pass since tracemalloc slows everything down
+    samples = min(iterations, 50)
+    tracemalloc.start()
+    allocated, peaks = [], []
+    for _ in range(samples):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        invoke(module, event)
+        current, peak = tracemalloc.get_traced_memory()
+        allocated.append((current - before) / 1024.0)
+        peaks.append((peak - before) / 1024.0)
+    tracemalloc.stop()
+    
+    return {
+        'latency_ms': summarize(latencies),
+        'retained_kb': round(sum(allocated) / samples, 2),
+        'peak_kb': round(max(peaks), 2)
+    }
+
+def load_events(events_file):
+    with open(events_file) as f:
+        return json.load(f)
+
+def print_report(report):
+    """Print the benchmark results as a table"""
+    print(f"\n{'Route':<18}{'init p50':>10}{'first p50':>11}{'warm p50':>10}{'p90':>9}{'p99':>9}{'peak KB':>10}")
+    print('-' * 77)
+    for route, stats in report.items():
+        cold = stats.get('cold')
+        warm = stats['warm']
+        init = f"{cold['init_ms']['p50']:.1f}" if cold else '-'
+        first = f"{cold['first_invoke_ms']['p50']:.2f}" if cold else '-'
+        print(
+            f"{route:<18}{init:>10}{first:>11}{warm['latency_ms']['p50']:>10.3f}"
+            f"{warm['latency_ms']['p90']:>9.3f}{warm['latency_ms']['p99']:>9.3f}{warm['peak_kb']:>10.1f}"
+        )
+    print("\nTimes in ms. init = module import in a fresh interpreter, first = first invocation after init")
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(
+        description='Benchmark lambda_function.py routes locally with stubbed AWS clients',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s
+  %(prog)s --routes api_gateway_get,health_check --warm 5000
+  %(prog)s --cold 0 --aws-latency-ms 20 --output bench.json
+        """
+    )
+    parser.add_argument('--events', default=os.path.join(HERE, 'test-events.json'),
+                        help='JSON file of named events (default: test-events.json)')
+    parser.add_argument('--routes',
+                        help='Comma-separated event names to run (default: all)')
+    parser.add_argument('--warm', type=int, default=1000,
+                        help='Warm iterations per route (default: 1000)')
+    parser.add_argument('--cold', type=int, default=5,
+                        help='Cold starts per route, each in a fresh interpreter (default: 5)')
+    parser.add_argument('--aws-latency-ms', type=float, default=0,
+                        help='Simulated latency for every stubbed AWS call (default: 0)')
+    parser.add_argument('--output', '-o', help='Write the JSON report to this file')
+    parser.add_argument('--cold-worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    # Keep verbose payload logging out of the measurements unless explicitly requested
+    os.environ.setdefault('LOG_SAMPLE_RATE', '0')
+    
+    if args.cold_worker:
+        cold_worker(args.cold_worker, args.events, args.aws_latency_ms)
+        return 0
+    
+    events = load_events(args.events)
+    routes = args.routes.split(',') if args.routes else list(events)
+    
+    print("=== Local Lambda Benchmark ===")
+    print(f"Routes: {', '.join(routes)} | warm iterations: {args.warm} | cold starts: {args.cold}")
+    
+    module, _ = load_handler_module(args.aws_latency_ms)
+    report = {}
+    for route in routes:
+        report[route] = {'warm': measure_warm(module, events[route], args.warm)}
+        if args.cold:
+            report[route]['cold'] = measure_cold(route, args.cold, args.events, args.aws_latency_ms)
+    
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -6,11 +6,18 @@ This script uses AWS Cost Explorer API and MCP tools to provide detailed optimiz
 """
 
 import json
+import os
 import subprocess
 import sys
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple
 
+# ce_cache.py lives with the Cost Explorer Lambda function; a copy next to this script takes precedence
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '11_aws-lambda',
+                             '11.4_deploy-python-runtime-lambda-function-console-terminal'))
+
+from ce_cache import CostExplorerCache, cli_command, default_backend
+
 def run_aws_command(command: List[str]) -> Dict:
     """Run AWS CLI command and return JSON result"""
     try:
@@ -38,7 +45,12 @@ def check_aws_cli():
         print("❌ AWS CLI not configured. Please run: aws configure")
         sys.exit(1)
 
-def get_top_services() -> List[Tuple[str, float]]:
+def open_cost_explorer_cache() -> CostExplorerCache:
+    """Cache for Cost Explorer responses, kept separate per AWS account"""
+    account_id = run_aws_command(['aws', 'sts', 'get-caller-identity', '--output', 'json']).get('Account', '')
+    return CostExplorerCache(default_backend(), namespace=account_id)
+
+def get_top_services(cache: CostExplorerCache) -> List[Tuple[str, float]]:
     """Get top 3 services by cost for previous month (more reliable than current month)"""
     # Calculate previous month date range
     today = datetime.now()
@@ -57,17 +69,21 @@ def get_top_services() -> List[Tuple[str, float]]:
     print("")
     
     # Query Cost Explorer - get raw data first to avoid JMESPath sorting issues
-    command = [
-        'aws', 'ce', 'get-cost-and-usage',
-        '--time-period', f'Start={month_start},End={month_end}',
-        '--granularity', 'MONTHLY',
-        '--metrics', 'BlendedCost',
-        '--group-by', 'Type=DIMENSION,Key=SERVICE',
-        '--output', 'json'
-    ]
+    query = {
+        'TimePeriod': {'Start': month_start, 'End': month_end},
+        'Granularity': 'MONTHLY',
+        'Metrics': ['BlendedCost'],
+        'GroupBy': [{'Type': 'DIMENSION', 'Key': 'SERVICE'}]
+    }
+    
+    def fetch_pages():
+        data = run_aws_command(cli_command(query))
+        return [data] if data else []
     
     print("🔍 Querying AWS Cost Explorer for top service costs...")
-    data = run_aws_command(command)
+    # Closed months come from the cache; each Cost Explorer API request costs $0.01
+    pages = list(cache.pages(query, fetch_pages))
+    data = pages[0] if pages else {}
     
     if not data or 'ResultsByTime' not in data or not data['ResultsByTime']:
         print("❌ No cost data available for the previous month.")
@@ -270,6 +286,13 @@ def display_service_analysis(rank: int, service_name: str, cost: float):
         print(f"      • {tip}")
     print("")
 
+def print_cache_stats(cache: CostExplorerCache):
+    """Show how many Cost Explorer requests the cache answered"""
+    stats = cache.stats()
+    print(f"💾 Cost Explorer cache: {stats['hits']} hit(s), {stats['misses']} miss(es), "
+          f"hit rate {stats['hit_rate']:.0%}, ${stats['api_cost_saved']:.2f} in API requests saved")
+    print("")
+
 def main():
     """Main function"""
     print("💰 AWS Cost Optimization Enhanced Analysis")
@@ -280,7 +303,9 @@ def main():
     check_aws_cli()
     
     # Get top services
-    top_services = get_top_services()
+    cache = open_cost_explorer_cache()
+    top_services = get_top_services(cache)
+    print_cache_stats(cache)
     
     if not top_services:
         sys.exit(1)
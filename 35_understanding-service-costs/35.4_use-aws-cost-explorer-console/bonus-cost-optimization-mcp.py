@@ -7,11 +7,18 @@ current optimization recommendations with real pricing data.
 """
 
 import json
+import os
 import subprocess
 import sys
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple, Optional
 
+# ce_cache.py lives with the Cost Explorer Lambda function; a copy next to this script takes precedence
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '11_aws-lambda',
+                             '11.4_deploy-python-runtime-lambda-function-console-terminal'))
+
+from ce_cache import CostExplorerCache, cli_command, default_backend
+
 class AWSCostOptimizer:
     def __init__(self):
         self.service_code_mapping = {
@@ -26,6 +33,7 @@ class AWSCostOptimizer:
             'Amazon Virtual Private Cloud': 'AmazonVPC',
             'Amazon Route 53': 'AmazonRoute53'
         }
+        self.cache = None
     
     def check_prerequisites(self):
         """Check if AWS CLI is installed and configured"""
@@ -63,6 +71,18 @@ class AWSCostOptimizer:
         except:
             return 'us-east-1'
     
+    def open_cost_explorer_cache(self) -> CostExplorerCache:
+        """Cache for Cost Explorer responses, kept separate per AWS account"""
+        account_id = self.run_aws_command(['aws', 'sts', 'get-caller-identity', '--output', 'json']).get('Account', '')
+        return CostExplorerCache(default_backend(), namespace=account_id)
+    
+    def print_cache_stats(self):
+        """Show how many Cost Explorer requests the cache answered"""
+        stats = self.cache.stats()
+        print(f"💾 Cost Explorer cache: {stats['hits']} hit(s), {stats['misses']} miss(es), "
+              f"hit rate {stats['hit_rate']:.0%}, ${stats['api_cost_saved']:.2f} in API requests saved")
+        print("")
+    
     def get_top_services(self) -> List[Tuple[str, float]]:
         """Get top 3 services by cost for previous month (more reliable than current month)"""
         # Calculate previous month date range
@@ -81,17 +101,23 @@ class AWSCostOptimizer:
         print("   💡 Using previous month data for more complete cost analysis")
         print("")
         
-        command = [
-            'aws', 'ce', 'get-cost-and-usage',
-            '--time-period', f'Start={month_start},End={month_end}',
-            '--granularity', 'MONTHLY',
-            '--metrics', 'BlendedCost',
-            '--group-by', 'Type=DIMENSION,Key=SERVICE',
-            '--output', 'json'
-        ]
+        query = {
+            'TimePeriod': {'Start': month_start, 'End': month_end},
+            'Granularity': 'MONTHLY',
+            'Metrics': ['BlendedCost'],
+            'GroupBy': [{'Type': 'DIMENSION', 'Key': 'SERVICE'}]
+        }
+        
+        def fetch_pages():
+            data = self.run_aws_command(cli_command(query))
+            return [data] if data else []
         
         print("🔍 Querying AWS Cost Explorer for top service costs...")
-        data = self.run_aws_command(command)
+        # Closed months come from the cache; each Cost Explorer API request costs $0.01
+        if self.cache is None:
+            self.cache = self.open_cost_explorer_cache()
+        pages = list(self.cache.pages(query, fetch_pages))
+        data = pages[0] if pages else {}
         
         if not data or 'ResultsByTime' not in data or not data['ResultsByTime']:
             print("❌ No cost data available for the previous month.")
@@ -407,6 +433,7 @@ class AWSCostOptimizer:
         
         # Get top services
         top_services = self.get_top_services()
+        self.print_cache_stats()
         
         if not top_services:
             sys.exit(1)